@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from database import month_range
+
+SECONDS_PER_DAY = 86400
+# 1970-01-01 jatuh pada hari Kamis; geser agar Senin = 0
+EPOCH_WEEKDAY = 3
+NAMA_HARI = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu']
+
+
+class SalesAnalytics:
+    # Analitik penjualan berbasis NumPy. Data sales dibaca per blok lalu diagregasi
+    # dengan bincount, sehingga memori hanya sebesar satu blok dan tidak ada loop per baris.
+    def __init__(self, db, chunk_size=100000):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def _chunks(self, start=None, end=None, product_id=None, localtime=False):
+        # Blok kolom: (epoch detik, product_id, quantity, total_price)
+        for rows in self.db.iter_sale_chunks(start, end, product_id, self.chunk_size, localtime):
+            data = np.array(rows, dtype=np.float64)
+            yield data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 2], data[:, 3]
+
+    def hourly_heatmap(self, start=None, end=None, product_id=None, value='quantity'):
+        # Matriks 7 x 24: hari dalam minggu (Senin..Minggu) x jam, menurut waktu lokal stasiun
+        heatmap = np.zeros(7 * 24)
+        for ts, _, quantity, revenue in self._chunks(start, end, product_id, localtime=True):
+            days, seconds = np.divmod(ts, SECONDS_PER_DAY)
+            bucket = ((days + EPOCH_WEEKDAY) % 7) * 24 + seconds // 3600
+            heatmap += np.bincount(bucket, weights=quantity if value == 'quantity' else revenue,
+                                   minlength=7 * 24)
+        return heatmap.reshape(7, 24)
+
+    def weekday_pattern(self, start=None, end=None, product_id=None):
+        # (jumlah transaksi, total liter, total pendapatan) per hari Senin..Minggu (waktu lokal)
+        counts = np.zeros(7)
+        quantities = np.zeros(7)
+        revenues = np.zeros(7)
+        for ts, _, quantity, revenue in self._chunks(start, end, product_id, localtime=True):
+            weekday = (ts // SECONDS_PER_DAY + EPOCH_WEEKDAY) % 7
+            counts += np.bincount(weekday, minlength=7)
+            quantities += np.bincount(weekday, weights=quantity, minlength=7)
+            revenues += np.bincount(weekday, weights=revenue, minlength=7)
+        return counts, quantities, revenues
+
+    def daily_totals(self, start, end, product_id=None, value='quantity'):
+        # Total per hari untuk rentang [start, end); indeks 0 = start
+        first_day = (start - date(1970, 1, 1)).days
+        totals = np.zeros((end - start).days)
+        for ts, _, quantity, revenue in self._chunks(start, end, product_id):
+            totals += np.bincount(ts // SECONDS_PER_DAY - first_day,
+                                  weights=quantity if value == 'quantity' else revenue,
+                                  minlength=len(totals))[:len(totals)]
+        return totals
+
+    def moving_average(self, values, window=7):
+        # Rata-rata bergerak; elemen ke-i = rata-rata window hari yang berakhir di hari i
+        if len(values) < window:
+            return np.array([])
+        cumsum = np.cumsum(np.concatenate(([0.0], values)))
+        return (cumsum[window:] - cumsum[:-window]) / window
+
+    def trend(self, start, end, product_id=None, window=7, value='quantity'):
+        # Total harian dan rata-rata bergerak untuk [start, end)
+        daily = self.daily_totals(start, end, product_id, value)
+        days = [start + timedelta(days=i) for i in range(len(daily))]
+        return days, daily, self.moving_average(daily, window)
+
+    def monthly_totals(self, year, product_id=None, value='quantity'):
+        # 12 total bulanan untuk satu tahun
+        start, _ = month_range(year, 1)
+        _, end = month_range(year, 12)
+        first_month = (year - 1970) * 12
+        totals = np.zeros(12)
+        for ts, _, quantity, revenue in self._chunks(start, end, product_id):
+            months = ts.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64) - first_month
+            totals += np.bincount(months, weights=quantity if value == 'quantity' else revenue,
+                                  minlength=12)[:12]
+        return totals
+
+    def year_over_year(self, year, product_id=None, value='quantity'):
+        # (bulanan tahun ini, bulanan tahun lalu, pertumbuhan % per bulan; NaN jika tahun lalu 0)
+        current = self.monthly_totals(year, product_id, value)
+        previous = self.monthly_totals(year - 1, product_id, value)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = np.where(previous > 0, (current - previous) / previous * 100, np.nan)
+        return current, previous, growth
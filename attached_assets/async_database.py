@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import queue
+import threading
+
+from database import InsufficientStockError, to_centiliters, to_rupiah
+
+logger = logging.getLogger('inventory.async')
+
+# Permintaan yang boleh menunggu di antrean sebelum pemanggil ikut menunggu (backpressure)
+DEFAULT_MAX_PENDING = 1000
+# Permintaan maksimum yang diambil worker sekaligus
+DEFAULT_MAX_BATCH = 500
+
+
+class _Request:
+    __slots__ = ('method', 'args', 'future', 'loop')
+
+    def __init__(self, method, args, future, loop):
+        self.method = method
+        self.args = args
+        self.future = future
+        self.loop = loop
+
+
+class AsyncDatabase:
+    # Fasad asyncio untuk Database. Semua operasi dijalankan berurutan oleh satu thread
+    # worker sehingga event loop tidak pernah menunggu commit. record_sale yang masuk
+    # bersamaan digabung ke satu transaksi (Database.record_sales); operasi lain
+    # dijalankan satu per satu sesuai urutan masuk.
+    def __init__(self, db, max_pending=DEFAULT_MAX_PENDING, max_batch=DEFAULT_MAX_BATCH):
+        self.db = db
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        # Jumlah permintaan yang belum selesai dibatasi semaphore, bukan ukuran antrean,
+        # agar pemanggil menunggu secara async alih-alih memblokir event loop
+        self._slots = asyncio.Semaphore(max_pending)
+        # Statistik penggabungan: jumlah transaksi penjualan dan penjualan di dalamnya
+        self.sale_transactions = 0
+        self.sales_committed = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='database-worker', daemon=True)
+        self._thread.start()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _submit(self, method, *args):
+        if self._closed:
+            raise RuntimeError("AsyncDatabase sudah ditutup")
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put(_Request(method, args, future, loop))
+        try:
+            return await future
+        finally:
+            self._slots.release()
+
+    # Penjualan (digabung per transaksi)
+
+    async def record_sale(self, product_id, quantity, total_price):
+        return await self._submit('record_sale', product_id, quantity, total_price)
+
+    async def record_sales(self, sales):
+        return await self._submit('record_sales', list(sales))
+
+    # Produk dan harga
+
+    async def add_product(self, name, stock, price, fuel_type_id=None):
+        return await self._submit('add_product', name, stock, price, fuel_type_id)
+
+    async def update_product(self, id, name, stock, price):
+        return await self._submit('update_product', id, name, stock, price)
+
+    async def restock(self, product_id, liters):
+        return await self._submit('restock', product_id, liters)
+
+    async def delete_product(self, id):
+        return await self._submit('delete_product', id)
+
+    async def update_fuel_price(self, product_id, new_price):
+        return await self._submit('update_fuel_price', product_id, new_price)
+
+    async def get_fuel_products(self):
+        return await self._submit('get_fuel_products')
+
+    async def get_all_products(self):
+        return await self._submit('get_all_products')
+
+    async def get_product(self, id):
+        return await self._submit('get_product', id)
+
+    async def search_products(self, query, limit=20):
+        return await self._submit('search_products', query, limit)
+
+    async def price_at(self, product_id, ts):
+        return await self._submit('price_at', product_id, ts)
+
+    # Laporan
+
+    async def get_monthly_sales(self, year, month):
+        return await self._submit('get_monthly_sales', year, month)
+
+    async def get_yearly_sales(self, year):
+        return await self._submit('get_yearly_sales', year)
+
+    async def close(self):
+        # Selesaikan semua permintaan yang sudah masuk lalu hentikan worker
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        await asyncio.to_thread(self._thread.join)
+
+    def _run(self):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            batch = [request]
+            stopping = False
+            while len(batch) < self.max_batch:
+                try:
+                    request = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+            try:
+                self._process(batch)
+            except Exception as e:
+                # Worker tidak boleh berhenti: pemanggil berikutnya akan menunggu selamanya
+                logger.exception('Kesalahan tak terduga di worker database')
+                for request in batch:
+                    self._resolve(request, error=e)
+            if stopping:
+                return
+
+    def _process(self, batch):
+        i = 0
+        while i < len(batch):
+            if batch[i].method != 'record_sale':
+                request = batch[i]
+                try:
+                    result = getattr(self.db, request.method)(*request.args)
+                except Exception as e:
+                    self._resolve(request, error=e)
+                else:
+                    self._resolve(request, result)
+                i += 1
+                continue
+            # record_sale berurutan dari banyak pemanggil: satu commit untuk semuanya
+            j = i
+            while j < len(batch) and batch[j].method == 'record_sale':
+                j += 1
+            self._commit_sales(batch[i:j])
+            i = j
+
+    def _commit_sales(self, requests):
+        # Argumen diperiksa per permintaan: satu penjualan tidak valid hanya menggagalkan
+        # future-nya sendiri, bukan seluruh transaksi gabungan
+        valid = []
+        for request in requests:
+            product_id, quantity, total_price = request.args
+            try:
+                to_centiliters(quantity)
+                to_rupiah(total_price)
+            except (TypeError, ValueError) as e:
+                self._resolve(request, error=e)
+                continue
+            valid.append(request)
+        if not valid:
+            return
+        try:
+            results = self.db.record_sales(request.args for request in valid)
+        except Exception as e:
+            logger.warning('Gagal menyimpan %d penjualan: %s', len(valid), e)
+            for request in valid:
+                self._resolve(request, error=e)
+            return
+        self.sale_transactions += 1
+        for request, sale_id in zip(valid, results):
+            if sale_id is None:
+                product_id, quantity, _ = request.args
+                self._resolve(request, error=InsufficientStockError(
+                    f"Stok produk {product_id} tidak mencukupi untuk {round(float(quantity), 2)}"))
+            else:
+                self.sales_committed += 1
+                # Sama seperti Database.record_sale yang tidak mengembalikan nilai
+                self._resolve(request, None)
+
+    @staticmethod
+    def _resolve(request, result=None, error=None):
+        def deliver():
+            if request.future.cancelled():
+                return
+            if error is not None:
+                request.future.set_exception(error)
+            else:
+                request.future.set_result(result)
+        try:
+            request.loop.call_soon_threadsafe(deliver)
+        except RuntimeError:
+            # Event loop pemanggil sudah ditutup; tidak ada yang menunggu hasilnya
+            pass
@@ -0,0 +1,546 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from async_database import AsyncDatabase
+from benchutil import percentile, random_product_name, startup_samples
+from database import (Database, InsufficientStockError, month_range, format_timestamp, sale_total,
+                      to_centiliters)
+from export import export_sales
+from federation import federated_monthly_sales
+from importer import import_sales
+from journal import SaleJournal
+
+# Query laporan lama (strftime per baris, tidak bisa memakai index)
+QUERY_BULANAN_LAMA = '''
+SELECT p.name, SUM(s.quantity), SUM(s.total_price)
+FROM sales s
+JOIN products p ON s.product_id = p.id
+WHERE strftime('%Y', s.sale_date) = ? AND strftime('%m', s.sale_date) = ?
+GROUP BY p.id, p.name
+'''
+
+QUERY_BULANAN_BARU = '''
+SELECT p.name, SUM(s.quantity), SUM(s.total_price)
+FROM sales s
+JOIN products p ON s.product_id = p.id
+WHERE s.sale_date >= ? AND s.sale_date < ?
+GROUP BY p.id, p.name
+'''
+
+
+def siapkan_db(direktori, stok=1e9):
+    # Stok besar agar benchmark tidak ditolak karena stok habis
+    db = Database(os.path.join(direktori, 'inventory.db'))
+    db.cursor.execute('UPDATE products SET stock = ?', (to_centiliters(stok),))
+    db.conn.commit()
+    db.invalidate_catalog()
+    return db
+
+
+def bench_record_sale(db, jumlah):
+    products = db.get_fuel_products()
+    mulai = time.perf_counter()
+    for i in range(jumlah):
+        product = products[i % len(products)]
+        db.record_sale(product[0], 0.01, product[3] * 0.01)
+    return time.perf_counter() - mulai
+
+
+def bench_record_sales(db, jumlah, ukuran_batch=500):
+    products = db.get_fuel_products()
+    mulai = time.perf_counter()
+    for awal in range(0, jumlah, ukuran_batch):
+        batch = []
+        for i in range(awal, min(awal + ukuran_batch, jumlah)):
+            product = products[i % len(products)]
+            batch.append((product[0], 0.01, product[3] * 0.01))
+        db.record_sales(batch)
+    return time.perf_counter() - mulai
+
+
+def bench_baca_katalog(db, jumlah):
+    # Pola layar BBM: daftar BBM lalu detail satu produk
+    mulai = time.perf_counter()
+    for i in range(jumlah):
+        products = db.get_fuel_products()
+        db.get_product(products[i % len(products)][0])
+    return time.perf_counter() - mulai
+
+
+def isi_produk_toko(db, jumlah, seed=42):
+    # Katalog SKU toko sintetis (nama acak dari suku kata)
+    rng = random.Random(seed)
+    rows = []
+    for i in range(jumlah):
+        rows.append((random_product_name(rng, i), to_centiliters(rng.randint(0, 100)), rng.randint(1000, 50000)))
+    db.cursor.executemany('INSERT INTO products (name, stock, price) VALUES (?, ?, ?)', rows)
+    db.conn.commit()
+    db.invalidate_catalog()
+
+
+def bench_cari_produk(db, kata_kunci, ulang=5):
+    hasil = {}
+    for nama, cari in [('LIKE (get_product_by_name)', db.get_product_by_name),
+                       ('FTS5 trigram (search_products)', db.search_products)]:
+        mulai = time.perf_counter()
+        for _ in range(ulang):
+            for kata in kata_kunci:
+                cari(kata)
+        hasil[nama] = (time.perf_counter() - mulai) / (ulang * len(kata_kunci))
+    return hasil
+
+
+def isi_penjualan_historis(db, jumlah, hari=365, seed=42):
+    # Penjualan sintetis tersebar selama `hari` terakhir
+    rng = random.Random(seed)
+    products = db.get_fuel_products()
+    akhir = datetime(2026, 1, 1)
+    rows = []
+    for _ in range(jumlah):
+        product = products[rng.randrange(len(products))]
+        tanggal = akhir - timedelta(seconds=rng.randrange(hari * 86400))
+        liter = round(rng.uniform(1, 60), 2)
+        rows.append((product[0], to_centiliters(liter), sale_total(liter, product[3]), format_timestamp(tanggal)))
+    db.cursor.executemany('INSERT INTO sales (product_id, quantity, total_price, sale_date) VALUES (?, ?, ?, ?)',
+                          rows)
+    db.conn.commit()
+
+
+def bench_laporan_bulanan(db, ulang=20):
+    start, end = month_range(2025, 6)
+    hasil = {}
+    for nama, query, params in [
+        ('strftime (lama)', QUERY_BULANAN_LAMA, ('2025', '06')),
+        ('rentang tanggal (baru)', QUERY_BULANAN_BARU, (format_timestamp(start), format_timestamp(end))),
+    ]:
+        db.cursor.execute('EXPLAIN QUERY PLAN ' + query, params)
+        rencana = ' / '.join(row[3] for row in db.cursor.fetchall())
+        mulai = time.perf_counter()
+        for _ in range(ulang):
+            db.cursor.execute(query, params)
+            db.cursor.fetchall()
+        hasil[nama] = ((time.perf_counter() - mulai) / ulang, rencana)
+    return hasil
+
+
+def bench_agregat(direktori, jumlah, ulang=10, seed=42):
+    # SUM/GROUP BY dan ukuran file: liter/rupiah sebagai REAL (skema lama) vs
+    # INTEGER centiliter/rupiah (skema sekarang) untuk data penjualan yang sama
+    rng = random.Random(seed)
+    akhir = datetime(2026, 1, 1)
+    data = []
+    for _ in range(jumlah):
+        liter = round(rng.uniform(1, 60), 2)
+        harga = rng.choice([10000, 12500, 6800])
+        tanggal = format_timestamp(akhir - timedelta(seconds=rng.randrange(365 * 86400)))
+        data.append((rng.randint(1, 3), liter, harga, tanggal))
+
+    hasil = {}
+    for nama, tipe, baris in [
+        ('REAL', 'REAL', [(pid, liter, liter * harga, tanggal) for pid, liter, harga, tanggal in data]),
+        ('INTEGER', 'INTEGER', [(pid, to_centiliters(liter), sale_total(liter, harga), tanggal)
+                                for pid, liter, harga, tanggal in data]),
+    ]:
+        path = os.path.join(direktori, f'agregat_{nama.lower()}.db')
+        conn = sqlite3.connect(path)
+        conn.execute(f'CREATE TABLE sales (id INTEGER PRIMARY KEY, product_id INTEGER, '
+                     f'quantity {tipe}, total_price {tipe}, sale_date TEXT)')
+        conn.executemany('INSERT INTO sales (product_id, quantity, total_price, sale_date) VALUES (?, ?, ?, ?)',
+                         baris)
+        conn.commit()
+        mulai = time.perf_counter()
+        for _ in range(ulang):
+            conn.execute('SELECT product_id, SUM(quantity), SUM(total_price) FROM sales GROUP BY product_id').fetchall()
+        durasi = (time.perf_counter() - mulai) / ulang
+        conn.close()
+        hasil[nama] = (durasi, os.path.getsize(path))
+    return hasil
+
+
+def stress_konkuren(db, penulis=4, pembaca=4, per_penulis=200):
+    # N thread penulis dan M thread pembaca pada satu file database
+    products = db.get_fuel_products()
+    db.cursor.execute('SELECT COUNT(*) FROM sales')
+    awal = db.cursor.fetchone()[0]
+    errors = []
+    selesai = threading.Event()
+
+    def tulis(nomor):
+        try:
+            for i in range(per_penulis):
+                product = products[(nomor + i) % len(products)]
+                db.record_sale(product[0], 0.01, product[3] * 0.01)
+        except Exception as e:
+            errors.append(e)
+
+    def baca():
+        try:
+            while not selesai.is_set():
+                db.get_fuel_products()
+                db.get_all_products()
+        except Exception as e:
+            errors.append(e)
+
+    threads_penulis = [threading.Thread(target=tulis, args=(i,)) for i in range(penulis)]
+    threads_pembaca = [threading.Thread(target=baca) for _ in range(pembaca)]
+    mulai = time.perf_counter()
+    for t in threads_pembaca + threads_penulis:
+        t.start()
+    for t in threads_penulis:
+        t.join()
+    durasi = time.perf_counter() - mulai
+    selesai.set()
+    for t in threads_pembaca:
+        t.join()
+
+    db.cursor.execute('SELECT COUNT(*) FROM sales')
+    tercatat = db.cursor.fetchone()[0] - awal
+    if errors:
+        raise errors[0]
+    if tercatat != penulis * per_penulis:
+        raise AssertionError(f"penjualan hilang: {tercatat} dari {penulis * per_penulis}")
+    return durasi
+
+
+def bench_jurnal(db, jumlah, kunci_ms=200):
+    # Latensi konfirmasi per penjualan: record_sale langsung vs lewat jurnal, sementara
+    # koneksi lain memegang kunci tulis selama kunci_ms (mis. backup atau laporan panjang)
+    products = db.get_fuel_products()
+    db.cursor.execute('SELECT COUNT(*) FROM sales')
+    awal = db.cursor.fetchone()[0]
+    hasil = {}
+    for nama in ['record_sale', 'jurnal']:
+        journal = SaleJournal(db) if nama == 'jurnal' else None
+        jual = journal.record_sale if journal else db.record_sale
+        pengunci = Database(db.path)
+        pengunci.cursor.execute('BEGIN IMMEDIATE')
+        timer = threading.Timer(kunci_ms / 1000, pengunci.conn.rollback)
+        timer.start()
+        terlama = 0.0
+        mulai = time.perf_counter()
+        for i in range(jumlah):
+            product = products[i % len(products)]
+            t = time.perf_counter()
+            jual(product[0], 0.01, product[3] * 0.01)
+            terlama = max(terlama, time.perf_counter() - t)
+        durasi = time.perf_counter() - mulai
+        timer.join()
+        if journal:
+            journal.close()
+        pengunci.close()
+        hasil[nama] = (durasi, terlama)
+
+    db.cursor.execute('SELECT COUNT(*) FROM sales')
+    tercatat = db.cursor.fetchone()[0] - awal
+    if tercatat != 2 * jumlah:
+        raise AssertionError(f"penjualan hilang: {tercatat} dari {2 * jumlah}")
+    return hasil
+
+
+def uji_jurnal_stok_pas(direktori, stok=10, liter=0.01, kasir=4):
+    # Menjual tepat seluruh stok lewat jurnal dari beberapa thread kasir (sementara flusher
+    # terus menyimpan batch) harus diterima semua; satu penjualan berikutnya harus ditolak
+    # dan stok tidak minus
+    db = Database(os.path.join(direktori, 'jurnal_pas.db'))
+    product_id = db.get_fuel_products()[0][0]
+    db.update_product(product_id, 'Pertalite Jurnal', stok, 10000)
+    journal = SaleJournal(db, flush_interval=0.0, batch_size=50, durable=False)
+    jumlah = round(stok / liter)
+    diterima = []
+
+    def jual(n):
+        ok = 0
+        for _ in range(n):
+            try:
+                journal.record_sale(product_id, liter, 10000 * liter)
+                ok += 1
+            except InsufficientStockError:
+                pass
+        diterima.append(ok)
+
+    try:
+        threads = [threading.Thread(target=jual, args=(jumlah // kasir + (i < jumlah % kasir),))
+                   for i in range(kasir)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        diterima = sum(diterima)
+        try:
+            journal.record_sale(product_id, liter, 10000 * liter)
+            lebih = True
+        except InsufficientStockError:
+            lebih = False
+    finally:
+        journal.close()
+    sisa = db.get_stock(product_id)
+    db.close()
+    if diterima != jumlah or lebih or sisa != 0:
+        raise AssertionError(f"jurnal: {diterima} dari {jumlah} diterima, penjualan lebih diterima={lebih}, "
+                             f"sisa stok {sisa}")
+    return diterima
+
+
+def uji_jurnal_stok_diambil(direktori, stok=10):
+    # Stok yang sudah dikonfirmasi jurnal lalu terjual langsung sebelum jurnal disimpan:
+    # entri jurnal harus ditolak dan dicatat, stok tidak boleh minus
+    db = Database(os.path.join(direktori, 'jurnal_diambil.db'))
+    product_id = db.get_fuel_products()[0][0]
+    db.update_product(product_id, 'Pertalite Jurnal', stok, 10000)
+    journal = SaleJournal(db, flush_interval=60, durable=False)
+    try:
+        journal_id = journal.record_sale(product_id, stok, 10000 * stok)
+        db.record_sale(product_id, stok, 10000 * stok)
+    finally:
+        journal.close()
+    sisa = db.get_stock(product_id)
+    ditolak = [row[0] for row in db.get_journal_rejections()]
+    db.close()
+    if sisa != 0 or ditolak != [journal_id]:
+        raise AssertionError(f"jurnal: sisa stok {sisa}, entri ditolak {ditolak}")
+    return len(ditolak)
+
+
+def uji_beban_async(db, terminal=2000, per_terminal=5, seed=42):
+    # Ribuan terminal pompa simulasi dalam satu event loop: setiap terminal membaca
+    # daftar BBM lalu mencatat penjualan, dengan jeda acak antar transaksi
+    rng = random.Random(seed)
+    products = db.get_fuel_products()
+    latensi = []
+
+    async def jalankan():
+        async with AsyncDatabase(db) as adb:
+            async def pompa_terminal(nomor):
+                for i in range(per_terminal):
+                    await asyncio.sleep(rng.random() * 0.01)
+                    await adb.get_fuel_products()
+                    product = products[(nomor + i) % len(products)]
+                    mulai = time.perf_counter()
+                    await adb.record_sale(product[0], 0.01, product[3] * 0.01)
+                    latensi.append(time.perf_counter() - mulai)
+
+            mulai = time.perf_counter()
+            await asyncio.gather(*(pompa_terminal(i) for i in range(terminal)))
+            return time.perf_counter() - mulai, adb.sale_transactions
+
+    durasi, transaksi = asyncio.run(jalankan())
+    return {
+        'durasi': durasi,
+        'penjualan': len(latensi),
+        'transaksi': transaksi,
+        'p50': percentile(latensi, 50),
+        'p95': percentile(latensi, 95),
+        'p99': percentile(latensi, 99),
+    }
+
+
+def ukur_memori_ekspor(db, start=None, end=None):
+    # Puncak alokasi Python selama ekspor CSV; harus datar berapa pun jumlah barisnya
+    with open(os.devnull, 'w', newline='') as out:
+        tracemalloc.start()
+        try:
+            count = export_sales(db, out, 'csv', start, end)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return count, peak
+
+
+def uji_memori_ekspor_datar(direktori, kecil=20000, besar=220000, batas_kib=2048, selisih_kib=256):
+    # Ekspor dua database dengan jumlah baris berbeda satu orde besaran: puncak memori
+    # keduanya harus di bawah batas tetap dan hampir sama (streaming, bukan fetchall)
+    hasil = {}
+    for jumlah in (kecil, besar):
+        folder = os.path.join(direktori, f'ekspor{jumlah}')
+        os.makedirs(folder)
+        db = siapkan_db(folder)
+        isi_penjualan_historis(db, jumlah)
+        count, peak = ukur_memori_ekspor(db)
+        db.close()
+        if count != jumlah:
+            raise AssertionError(f"ekspor {count} baris dari {jumlah}")
+        if peak > batas_kib * 1024:
+            raise AssertionError(f"puncak memori ekspor {jumlah} baris {peak / 1024:.1f} KiB > {batas_kib} KiB")
+        hasil[jumlah] = peak
+    if hasil[besar] - hasil[kecil] > selisih_kib * 1024:
+        raise AssertionError(f"memori ekspor naik {(hasil[besar] - hasil[kecil]) / 1024:.1f} KiB "
+                             f"dari {kecil} ke {besar} baris")
+    return hasil
+
+
+def pompa(path, product_id, liter, hasil):
+    # Satu proses pompa: terus menjual sampai stok habis
+    db = Database(path)
+    terjual = ditolak = 0
+    while True:
+        try:
+            db.record_sale(product_id, liter, liter * 10000)
+            terjual += 1
+        except InsufficientStockError:
+            ditolak += 1
+            break
+    db.close()
+    hasil.put((terjual, ditolak))
+
+
+def simulasi_pompa(direktori, jumlah_pompa=4, stok=200, liter=0.25):
+    # Beberapa proses menjual produk yang sama sampai habis; stok tidak boleh minus
+    # dan total liter terjual harus sama persis dengan stok awal
+    path = os.path.join(direktori, 'pompa.db')
+    db = Database(path)
+    product_id = db.get_fuel_products()[0][0]
+    db.update_product(product_id, 'Pertalite Pompa', stok, 10000)
+
+    hasil = multiprocessing.Queue()
+    proses = [multiprocessing.Process(target=pompa, args=(path, product_id, liter, hasil))
+              for _ in range(jumlah_pompa)]
+    mulai = time.perf_counter()
+    for p in proses:
+        p.start()
+    terjual = sum(hasil.get()[0] for _ in proses)
+    for p in proses:
+        p.join()
+    durasi = time.perf_counter() - mulai
+
+    db.invalidate_catalog()
+    sisa = db.get_product(product_id)[2]
+    db.cursor.execute('SELECT COALESCE(SUM(quantity), 0) / 100.0 FROM sales WHERE product_id = ?', (product_id,))
+    total_liter = db.cursor.fetchone()[0]
+    db.close()
+    if sisa < 0 or abs(total_liter - stok) > 1e-6 or abs(terjual * liter - stok) > 1e-6:
+        raise AssertionError(f"oversell: sisa={sisa}, terjual={total_liter} liter dari stok {stok}")
+    return terjual, durasi
+
+
+def bench_federasi(direktori, jumlah_stasiun=16, penjualan=20000):
+    # Laporan bulanan gabungan: Database() per stasiun secara serial vs federasi read-only
+    paths = []
+    for i in range(jumlah_stasiun):
+        folder = os.path.join(direktori, f'stasiun{i:03d}')
+        os.makedirs(folder)
+        db = siapkan_db(folder)
+        isi_penjualan_historis(db, penjualan, seed=i)
+        paths.append(db.path)
+        db.close()
+
+    # Pemanasan cache file sistem agar urutan pengukuran tidak berpengaruh
+    federated_monthly_sales(paths, 2025, 6, 1)
+    hasil = {}
+    mulai = time.perf_counter()
+    for path in paths:
+        db = Database(path)
+        db.get_monthly_sales(2025, 6)
+        db.close()
+    hasil['Database() serial'] = time.perf_counter() - mulai
+    for nama, workers in [('read-only serial', 1), (f'read-only pool {os.cpu_count()} proses', None)]:
+        mulai = time.perf_counter()
+        federated_monthly_sales(paths, 2025, 6, workers)
+        hasil[nama] = time.perf_counter() - mulai
+    return hasil
+
+
+def bench_impor(direktori, jumlah, seed=42):
+    # Impor CSV riwayat penjualan (format sama dengan ekspor) ke database baru
+    rng = random.Random(seed)
+    nama = ['Pertalite', 'Pertamax', 'Solar']
+    akhir = datetime(2026, 1, 1)
+    sumber = io.StringIO()
+    sumber.write('id,product_id,product_name,quantity,total_price,sale_date\n')
+    for i in range(jumlah):
+        liter = round(rng.uniform(1, 60), 2)
+        tanggal = format_timestamp(akhir - timedelta(seconds=rng.randrange(365 * 86400)))
+        sumber.write(f"{i},,{nama[i % 3]},{liter},{liter * 10000},{tanggal}\n")
+    sumber.seek(0)
+    db = siapkan_db(direktori)
+    mulai = time.perf_counter()
+    progress = import_sales(db, sumber)
+    durasi = time.perf_counter() - mulai
+    db.close()
+    if progress.loaded != jumlah:
+        raise AssertionError(f"baris hilang: {progress.loaded} dari {jumlah}")
+    return durasi
+
+
+def bench_startup(direktori, ulang=10):
+    # Median startup, diukur dengan cara yang sama seperti benchsuite (benchutil.startup_samples)
+    sampel = startup_samples(os.path.join(direktori, 'inventory.db'), direktori, ulang)
+    return {
+        'Database() file baru': percentile(sampel['startup_new'], 50),
+        'Database() file terbaru': percentile(sampel['startup_existing'], 50),
+        'main.py products (proses)': percentile(sampel['startup_process'], 50),
+    }
+
+
+def cetak_hasil(nama, jumlah, durasi):
+    print(f"{nama:<30} {jumlah:>8} penjualan  {durasi:8.3f} s  {jumlah / durasi:10.0f} penjualan/s")
+
+
+def main():
+    jumlah = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        db = siapkan_db(tmp)
+        cetak_hasil('record_sale (per penjualan)', jumlah, bench_record_sale(db, jumlah))
+        cetak_hasil('record_sales (batch 500)', jumlah, bench_record_sales(db, jumlah))
+        cetak_hasil('stress 4 penulis + 4 pembaca', 4 * 200, stress_konkuren(db))
+        for nama, (durasi, terlama) in bench_jurnal(db, jumlah).items():
+            print(f"{nama + ' (database terkunci)':<30} {jumlah:>8} jual  {durasi:8.3f} s  "
+                  f"konfirmasi terlama {terlama * 1000:.1f} ms")
+        with tempfile.TemporaryDirectory() as tmp_jurnal:
+            print(f"{'jurnal jual tepat sebesar stok':<30} {uji_jurnal_stok_pas(tmp_jurnal):>8} jual  semua diterima")
+            print(f"{'jurnal stok diambil penjual lain':<30} {uji_jurnal_stok_diambil(tmp_jurnal):>8} entri ditolak")
+        hasil = uji_beban_async(db)
+        cetak_hasil('async 2000 terminal', hasil['penjualan'], hasil['durasi'])
+        print(f"{'  latensi record_sale':<30} p50 {hasil['p50'] * 1000:.1f} ms  p95 {hasil['p95'] * 1000:.1f} ms  "
+              f"p99 {hasil['p99'] * 1000:.1f} ms  ({hasil['transaksi']} transaksi)")
+        terjual, durasi = simulasi_pompa(tmp)
+        cetak_hasil('simulasi 4 proses pompa', terjual, durasi)
+        durasi = bench_baca_katalog(db, jumlah * 10)
+        print(f"{'baca katalog (cache)':<30} {jumlah * 10:>8} baca  {durasi:8.3f} s  {db.cache_stats()}")
+
+        isi_penjualan_historis(db, jumlah * 100)
+        for nama, (durasi, rencana) in bench_laporan_bulanan(db).items():
+            print(f"{'laporan bulanan ' + nama:<30} {durasi * 1000:8.2f} ms  [{rencana}]")
+        for start, end in [('2025-06-01', '2025-06-08'), (None, None)]:
+            count, peak = ukur_memori_ekspor(db, start, end)
+            print(f"{'ekspor CSV':<30} {count:>8} baris  puncak memori {peak / 1024:8.1f} KiB")
+        db.close()
+
+        for nama, durasi in bench_startup(tmp).items():
+            print(f"{'startup ' + nama:<30} {durasi * 1000:8.2f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for jumlah_baris, peak in uji_memori_ekspor_datar(tmp).items():
+            print(f"{'ekspor CSV (uji memori datar)':<30} {jumlah_baris:>8} baris  puncak memori {peak / 1024:8.1f} KiB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for nama, (durasi, ukuran) in bench_agregat(tmp, jumlah * 100).items():
+            print(f"{'SUM/GROUP BY ' + nama:<30} {durasi * 1000:8.2f} ms  file {ukuran / 1024:10.1f} KiB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cetak_hasil('impor CSV penjualan', jumlah * 100, bench_impor(tmp, jumlah * 100))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for nama, durasi in bench_federasi(tmp).items():
+            print(f"{'federasi ' + nama:<30} {durasi * 1000:8.2f} ms  (16 stasiun)")
+
+    # Pencarian nama pada katalog 100 ribu produk
+    with tempfile.TemporaryDirectory() as tmp:
+        db = siapkan_db(tmp)
+        isi_produk_toko(db, 100000)
+        for nama, durasi in bench_cari_produk(db, ['Pertalite', 'kasu', 'Rotila 99', 'xyz']).items():
+            print(f"{'cari ' + nama:<30} {durasi * 1000:8.2f} ms/query")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+import argparse
+import bisect
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchutil import percentile, random_product_name, startup_samples, time_calls
+from database import Database, format_timestamp, month_range, sale_total, to_centiliters
+
+# Versi format file hasil; baseline dengan versi berbeda tidak dibandingkan
+SUITE_VERSION = 1
+# Data sintetis selalu berakhir di tanggal yang sama agar hasil generator identik antar run
+DATASET_END = datetime(2026, 1, 1)
+# Stok awal semua produk (liter), cukup besar agar benchmark record_sale tidak pernah ditolak
+DATASET_STOCK = 10_000_000
+# Penurunan kinerja relatif terhadap baseline yang dianggap regresi
+DEFAULT_THRESHOLD = 0.2
+# Baris penjualan per batch bulk_load_sales
+GENERATE_BATCH_SIZE = 50000
+
+
+def generate_dataset(path, products=1000, fuel_types=3, years=2, sales_per_day=200, price_changes=12, seed=42):
+    # Database sintetis deterministik: `fuel_types` tipe BBM (minimal 3 bawaan) masing-masing
+    # dengan satu produk BBM, sisanya produk toko hingga `products` produk, `price_changes`
+    # perubahan harga per produk BBM per tahun, dan `years` tahun penjualan yang memakai
+    # harga yang berlaku saat itu. Seed yang sama selalu menghasilkan data yang sama.
+    if os.path.exists(path):
+        raise FileExistsError(f"Database sudah ada: {path}")
+    if fuel_types < 3:
+        raise ValueError("Minimal 3 tipe BBM (tipe bawaan database baru)")
+    if products < fuel_types:
+        raise ValueError("Jumlah produk harus minimal sama dengan jumlah tipe BBM")
+
+    rng = random.Random(seed)
+    db = Database(path)
+    try:
+        extra = [(f'BBM Sintetis {i}', 'BBM sintetis') for i in range(1, fuel_types - 2)]
+        db.cursor.executemany('INSERT INTO fuel_types (name, description) VALUES (?, ?)', extra)
+        db.conn.commit()
+        db.cursor.execute('SELECT id, name FROM fuel_types WHERE id > 3 ORDER BY id')
+        rows = [(name, DATASET_STOCK, rng.randint(60, 160) * 100, fuel_type_id)
+                for fuel_type_id, name in db.cursor.fetchall()]
+        for i in range(products - fuel_types):
+            rows.append((random_product_name(rng, i), DATASET_STOCK, rng.randint(10, 500) * 100, None))
+        db.bulk_load_products([rows])
+        db.cursor.execute('UPDATE products SET stock = ?', (to_centiliters(DATASET_STOCK),))
+        db.conn.commit()
+        db.invalidate_catalog()
+
+        days = years * 365
+        start = DATASET_END - timedelta(days=days)
+        fuel = [product[0] for product in db.get_fuel_products()]
+        shop = [product[0] for product in db.get_all_products() if product[4] is None]
+        prices = {product[0]: product[3] for product in db.get_all_products()}
+
+        # Per produk BBM: (harga berurutan, tanggal perubahan urut); harga ke-i berlaku
+        # sebelum perubahan ke-i, harga terakhir setelah perubahan terakhir
+        changes = {}
+        history = []
+        for product_id in fuel:
+            price = prices[product_id]
+            dates = sorted(format_timestamp(start + timedelta(seconds=rng.randrange(days * 86400)))
+                           for _ in range(price_changes * years))
+            changes[product_id] = ([prices[product_id]], dates)
+            for change_date in dates:
+                new_price = max(1000, price + rng.randint(-10, 10) * 100)
+                history.append((product_id, price, new_price, change_date))
+                changes[product_id][0].append(new_price)
+                price = new_price
+            prices[product_id] = price
+        db.cursor.executemany('''
+        INSERT INTO fuel_price_history (product_id, old_price, new_price, change_date) VALUES (?, ?, ?, ?)
+        ''', sorted(history, key=lambda row: row[3]))
+        db.cursor.executemany('UPDATE products SET price = ? WHERE id = ?',
+                              [(price, product_id) for product_id, price in prices.items()])
+        db.conn.commit()
+        db.invalidate_catalog()
+
+        totals = [0, 0]
+
+        def sales():
+            batch = []
+            for day in range(days):
+                day_start = start + timedelta(days=day)
+                for _ in range(sales_per_day):
+                    sale_date = format_timestamp(day_start + timedelta(seconds=rng.randrange(86400)))
+                    if not shop or rng.random() < 0.8:
+                        product_id = fuel[rng.randrange(len(fuel))]
+                        quantity = round(rng.uniform(1, 60), 2)
+                        history_prices, dates = changes[product_id]
+                        price = history_prices[bisect.bisect_right(dates, sale_date)]
+                    else:
+                        product_id = shop[rng.randrange(len(shop))]
+                        quantity = rng.randint(1, 5)
+                        price = prices[product_id]
+                    total_price = sale_total(quantity, price)
+                    totals[0] += to_centiliters(quantity)
+                    totals[1] += total_price
+                    batch.append((product_id, quantity, total_price, sale_date))
+                    if len(batch) >= GENERATE_BATCH_SIZE:
+                        yield batch
+                        batch = []
+            if batch:
+                yield batch
+
+        sale_count = db.bulk_load_sales(sales(), update_stock=False)
+    finally:
+        db.close()
+
+    return {
+        'products': products,
+        'fuel_types': fuel_types,
+        'years': years,
+        'sales_per_day': sales_per_day,
+        'price_changes': price_changes,
+        'seed': seed,
+        'sales': sale_count,
+        'price_history': len(history),
+        # Total centiliter dan rupiah: sidik data untuk memastikan baseline memakai data yang sama
+        'checksum': f'{totals[0]}:{totals[1]}',
+    }
+
+
+def _latency(samples):
+    return {'value': percentile(samples, 50) * 1000, 'unit': 'ms', 'higher_is_better': False,
+            'p95': percentile(samples, 95) * 1000, 'samples': len(samples)}
+
+
+def bench_startup(path, directory, repeat):
+    return {name: _latency(samples) for name, samples in startup_samples(path, directory, repeat).items()}
+
+
+def bench_reads(path, dataset, repeat):
+    results = {}
+    db = Database(path)
+    try:
+        last = DATASET_END - timedelta(days=1)
+        months = []
+        year, month = last.year, last.month
+        for _ in range(dataset['years'] * 12):
+            months.append((year, month))
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        samples = []
+        for _ in range(repeat):
+            for year, month in months:
+                samples.extend(time_calls(lambda: db.get_monthly_sales(year, month), 1))
+        results['get_monthly_sales'] = _latency(samples)
+
+        # Tanpa rekap harian: agregasi langsung dari tabel sales untuk bulan terakhir
+        start, end = month_range(*months[0])
+        results['get_sales_between_month'] = _latency(time_calls(lambda: db.get_sales_between(start, end), repeat))
+
+        rng = random.Random(dataset['seed'])
+        products = db.get_all_products()
+        names = [products[rng.randrange(len(products))][1] for _ in range(20)] + ['Tidak Ada', 'xyz']
+        samples = []
+        for _ in range(repeat):
+            for name in names:
+                samples.extend(time_calls(lambda: db.get_product_by_name(name), 1))
+        results['get_product_by_name'] = _latency(samples)
+
+        results['get_fuel_products'] = _latency(time_calls(db.get_fuel_products, repeat, calls=1000))
+
+        def cold():
+            db.invalidate_catalog()
+            db.get_fuel_products()
+        results['get_fuel_products_cold'] = _latency(time_calls(cold, repeat))
+    finally:
+        db.close()
+    return results
+
+
+def bench_record_sale(path, count, repeat):
+    # Dijalankan terakhir karena menambah penjualan ke database hasil generator
+    db = Database(path)
+    try:
+        fuel = db.get_fuel_products()
+        rounds = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for i in range(count):
+                product = fuel[i % len(fuel)]
+                db.record_sale(product[0], 10, sale_total(10, product[3]))
+            rounds.append(count / (time.perf_counter() - started))
+    finally:
+        db.close()
+    return {'record_sale': {'value': percentile(rounds, 50), 'unit': 'ops/s', 'higher_is_better': True,
+                            'min': min(rounds), 'samples': len(rounds)}}
+
+
+def run_suite(dataset_options, repeat=5, sales=500, directory=None):
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        path = os.path.join(tmp, 'inventory.db')
+        started = time.perf_counter()
+        dataset = generate_dataset(path, **dataset_options)
+        dataset['generate_seconds'] = round(time.perf_counter() - started, 3)
+
+        results = {}
+        results.update(bench_startup(path, tmp, repeat))
+        results.update(bench_reads(path, dataset, repeat))
+        results.update(bench_record_sale(path, sales, repeat))
+
+    return {
+        'suite_version': SUITE_VERSION,
+        'created_at': format_timestamp(datetime.now(timezone.utc).replace(tzinfo=None)),
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'dataset': dataset,
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    # (perbandingan per operasi, peringatan). Regresi: lebih lambat dari baseline lebih dari
+    # `threshold` (relatif), sesuai arah metrik (latensi lebih kecil / throughput lebih besar lebih baik)
+    warnings = []
+    if baseline.get('suite_version') != report['suite_version']:
+        return [], [f"versi suite baseline {baseline.get('suite_version')} berbeda, tidak dibandingkan"]
+    keys = ('products', 'fuel_types', 'years', 'sales_per_day', 'price_changes', 'seed', 'checksum')
+    if any(baseline['dataset'].get(key) != report['dataset'].get(key) for key in keys):
+        warnings.append('dataset baseline berbeda; perbandingan tidak sebanding')
+    if baseline.get('environment') != report['environment']:
+        warnings.append('lingkungan (Python/SQLite/platform) baseline berbeda')
+
+    rows = []
+    for name, result in report['results'].items():
+        previous = baseline['results'].get(name)
+        if not previous or not previous['value']:
+            continue
+        change = (result['value'] - previous['value']) / previous['value']
+        worse = -change if result['higher_is_better'] else change
+        rows.append({'name': name, 'baseline': previous['value'], 'current': result['value'],
+                     'unit': result['unit'], 'change': change, 'regression': worse > threshold})
+    return rows, warnings
+
+
+def _format(value):
+    # Operasi dari cache jauh di bawah 1 ms; tampilkan angka penting, bukan 0.001
+    return f"{value:,.3f}" if value >= 1 else f"{value:.4g}"
+
+
+def print_report(report, comparison, warnings, out):
+    dataset = report['dataset']
+    print(f"Dataset: {dataset['products']} produk, {dataset['fuel_types']} tipe BBM, {dataset['sales']:,} penjualan, "
+          f"{dataset['price_history']} perubahan harga (dibuat dalam {dataset['generate_seconds']} s)", file=out)
+    changes = {row['name']: row for row in comparison}
+    for name, result in report['results'].items():
+        line = f"{name:<26} {_format(result['value']):>12} {result['unit']:<6}"
+        row = changes.get(name)
+        if row:
+            line += f" baseline {_format(row['baseline']):>12}  {row['change']:+7.1%}"
+            if row['regression']:
+                line += '  REGRESI'
+        print(line, file=out)
+    for warning in warnings:
+        print(f"Peringatan: {warning}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark operasi inti Database dengan data sintetis deterministik')
+    parser.add_argument('--products', type=int, default=1000, help='Jumlah produk (termasuk produk BBM)')
+    parser.add_argument('--fuel-types', type=int, default=3, help='Jumlah tipe BBM (minimal 3)')
+    parser.add_argument('--years', type=int, default=2, help='Tahun riwayat penjualan')
+    parser.add_argument('--sales-per-day', type=int, default=200)
+    parser.add_argument('--price-changes', type=int, default=12, help='Perubahan harga per produk BBM per tahun')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5, help='Pengulangan setiap pengukuran')
+    parser.add_argument('--sales', type=int, default=500, help='record_sale per pengulangan')
+    parser.add_argument('--output', help="File hasil JSON ('-' untuk stdout)")
+    parser.add_argument('--baseline', help='File hasil JSON sebelumnya sebagai pembanding')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Batas penurunan relatif yang dianggap regresi (default 0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    dataset_options = {
+        'products': args.products,
+        'fuel_types': args.fuel_types,
+        'years': args.years,
+        'sales_per_day': args.sales_per_day,
+        'price_changes': args.price_changes,
+        'seed': args.seed,
+    }
+    try:
+        report = run_suite(dataset_options, args.repeat, args.sales)
+    except (FileExistsError, ValueError) as e:
+        parser.error(str(e))
+
+    comparison, warnings = [], []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            comparison, warnings = compare(report, json.load(f), args.threshold)
+        report['comparison'] = {'baseline': args.baseline, 'threshold': args.threshold,
+                                'results': comparison, 'warnings': warnings}
+
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    elif args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    print_report(report, comparison, warnings, sys.stderr if args.output == '-' else sys.stdout)
+    return 1 if any(row['regression'] for row in comparison) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
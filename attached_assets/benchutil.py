@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import time
+
+from database import Database
+
+# Suku kata untuk nama produk toko sintetis
+SUKU_KATA = ['ka', 'ro', 'ti', 'su', 'bu', 'me', 'la', 'ni', 'go', 'pa', 'sa', 'de', 'mi', 'ko', 'ra']
+
+
+def random_product_name(rng, i):
+    # Nama SKU toko acak dari suku kata; nomor urut membuatnya unik
+    name = ''.join(rng.choice(SUKU_KATA) for _ in range(rng.randint(3, 6))).title()
+    return f"{name} {i}"
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def time_calls(fn, repeat, calls=1):
+    # Durasi per panggilan (detik) untuk `repeat` sampel, masing-masing `calls` panggilan
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        samples.append((time.perf_counter() - started) / calls)
+    return samples
+
+
+def startup_samples(path, directory, repeat):
+    # Sampel durasi (detik): Database() pada file baru (migrasi + data awal), pada `path`
+    # yang sudah versi terbaru, dan satu perintah non-interaktif main.py sebagai proses baru
+    fresh = iter(range(repeat))
+    samples = {
+        'startup_new': time_calls(
+            lambda: Database(os.path.join(directory, f'startup{next(fresh)}.db')).close(), repeat),
+        'startup_existing': time_calls(lambda: Database(path).close(), repeat),
+    }
+    main_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+    samples['startup_process'] = time_calls(
+        lambda: subprocess.run([sys.executable, main_py, '--db', path, 'products', '--fuel'],
+                               check=True, stdout=subprocess.DEVNULL), repeat)
+    return samples
@@ -0,0 +1,292 @@
+import argparse
+import contextlib
+import io
+import json
+import shlex
+import sys
+
+from database import Database, InsufficientStockError, sale_total, to_rupiah
+
+
+class CommandError(Exception):
+    pass
+
+
+class CommandParser(argparse.ArgumentParser):
+    # Kesalahan argumen dilempar sebagai exception, bukan keluar dari proses,
+    # supaya satu baris script yang salah tidak menghentikan baris berikutnya
+    def error(self, message):
+        raise CommandError(message)
+
+
+def build_parser():
+    parser = CommandParser(prog='main.py', description='Antarmuka non-interaktif sistem inventori')
+    parser.add_argument('--db', help='Lokasi file database')
+    parser.add_argument('--script', help="Jalankan perintah per baris dari file ('-' untuk stdin)")
+    parser.add_argument('--profile', action='store_true',
+                        help='Catat latensi per method Database dan tampilkan di stderr')
+    parser.add_argument('--slow-ms', type=float, default=100,
+                        help='Batas query lambat untuk log (ms), dipakai bersama --profile')
+    parser.add_argument('--journal', action='store_true',
+                        help='Catat penjualan lewat jurnal dan simpan ke database secara batch')
+    sub = parser.add_subparsers(dest='command')
+
+    p = sub.add_parser('products', help='Daftar produk')
+    p.add_argument('--fuel', action='store_true', help='Hanya produk BBM')
+
+    p = sub.add_parser('product', help='Detail satu produk')
+    p.add_argument('--id', type=int, required=True)
+
+    p = sub.add_parser('search', help='Cari produk berdasarkan nama')
+    p.add_argument('query')
+    p.add_argument('--limit', type=int, default=20)
+
+    p = sub.add_parser('add-product', help='Tambah produk / tambah stok produk dengan nama sama')
+    p.add_argument('--name', required=True)
+    p.add_argument('--stock', type=float, required=True)
+    p.add_argument('--price', type=float, required=True)
+    p.add_argument('--fuel-type-id', type=int)
+
+    p = sub.add_parser('sale', help='Catat penjualan')
+    p.add_argument('--product', type=int, required=True)
+    jumlah = p.add_mutually_exclusive_group(required=True)
+    jumlah.add_argument('--liters', '--quantity', dest='quantity', type=float)
+    jumlah.add_argument('--amount', type=float, help='Nominal rupiah')
+
+    p = sub.add_parser('restock', help='Tambah stok produk')
+    p.add_argument('--product', type=int, required=True)
+    p.add_argument('--liters', '--quantity', dest='quantity', type=float, required=True)
+
+    p = sub.add_parser('price', help='Update harga BBM')
+    p.add_argument('--product', type=int, required=True)
+    p.add_argument('--price', type=float, required=True)
+
+    p = sub.add_parser('price-at', help='Harga yang berlaku pada waktu tertentu')
+    p.add_argument('--product', type=int, required=True)
+    p.add_argument('--at', required=True, help="Waktu, format 'YYYY-MM-DD HH:MM:SS'")
+
+    p = sub.add_parser('audit-prices', help='Cari penjualan yang total harganya tidak sesuai harga saat itu')
+    p.add_argument('--start', help='Tanggal awal (YYYY-MM-DD)')
+    p.add_argument('--end', help='Tanggal akhir, eksklusif (YYYY-MM-DD)')
+
+    p = sub.add_parser('report', help='Laporan bulanan, atau tahunan jika --month tidak diisi')
+    p.add_argument('--year', type=int, required=True)
+    p.add_argument('--month', type=int)
+
+    p = sub.add_parser('forecast', help='Perkiraan stok BBM habis dan rekomendasi pemesanan')
+    p.add_argument('--lead-time', type=int, default=24, help='Waktu pengiriman (jam)')
+    p.add_argument('--cover', type=int, default=72, help='Lama stok harus mencukupi setelah datang (jam)')
+
+    sub.add_parser('rebuild-rollup', help='Hitung ulang rekap penjualan harian')
+
+    p = sub.add_parser('archive', help='Pindahkan penjualan satu bulan yang sudah tutup ke file arsip')
+    p.add_argument('--year', type=int, required=True)
+    p.add_argument('--month', type=int, required=True)
+    p.add_argument('--vacuum', action='store_true', help='Kecilkan file database setelah pengarsipan')
+
+    sub.add_parser('archives', help='Daftar bulan yang sudah diarsipkan')
+
+    sub.add_parser('journal-rejections', help='Penjualan jurnal yang ditolak saat disimpan karena stok habis')
+    return parser
+
+
+def product_dict(product):
+    return {'id': product[0], 'name': product[1], 'stock': product[2], 'price': product[3]}
+
+
+def get_product_or_fail(db, product_id):
+    product = db.get_product(product_id)
+    if not product:
+        raise CommandError(f"Produk {product_id} tidak ditemukan")
+    return product
+
+
+def run_command(db, args, journal=None):
+    # Jalankan satu perintah dan kembalikan hasilnya sebagai dict yang bisa di-JSON-kan
+    if args.command == 'products':
+        products = db.get_fuel_products() if args.fuel else db.get_all_products()
+        return {'products': [product_dict(p) for p in products]}
+
+    if args.command == 'product':
+        return {'product': product_dict(get_product_or_fail(db, args.id))}
+
+    if args.command == 'search':
+        return {'products': [product_dict(p) for p in db.search_products(args.query, args.limit)]}
+
+    if args.command == 'add-product':
+        if not args.name or args.stock < 0 or args.price < 0:
+            raise CommandError("Data tidak valid")
+        db.add_product(args.name, args.stock, args.price, args.fuel_type_id)
+        return {}
+
+    if args.command == 'sale':
+        product = get_product_or_fail(db, args.product)
+        if args.quantity is not None:
+            quantity = args.quantity
+            total = sale_total(quantity, product[3])
+        else:
+            if product[3] <= 0:
+                raise CommandError("Harga produk belum diisi, penjualan berdasarkan nominal tidak bisa dihitung")
+            total = to_rupiah(args.amount)
+            quantity = total / product[3]
+        if quantity <= 0:
+            raise CommandError("Jumlah tidak valid")
+        try:
+            if journal:
+                journal_id = journal.record_sale(product[0], quantity, total)
+            else:
+                db.record_sale(product[0], quantity, total)
+        except InsufficientStockError:
+            raise CommandError("Stok tidak mencukupi")
+        result = {'product': product[0], 'quantity': round(quantity, 2), 'total_price': total}
+        if journal:
+            result['journal_id'] = journal_id
+        return result
+
+    if args.command == 'restock':
+        product = get_product_or_fail(db, args.product)
+        if args.quantity <= 0:
+            raise CommandError("Jumlah tidak valid")
+        return {'product': product_dict(db.restock(product[0], args.quantity))}
+
+    if args.command == 'price':
+        get_product_or_fail(db, args.product)
+        if args.price <= 0:
+            raise CommandError("Harga tidak valid")
+        db.update_fuel_price(args.product, args.price)
+        return {'product': product_dict(db.get_product(args.product))}
+
+    if args.command == 'price-at':
+        get_product_or_fail(db, args.product)
+        return {'product': args.product, 'at': args.at, 'price': db.price_at(args.product, args.at)}
+
+    if args.command == 'audit-prices':
+        return {'discrepancies': [
+            {'sale_id': sale_id, 'product': product_id, 'sale_date': sale_date, 'quantity': quantity,
+             'total_price': total_price, 'expected_total': expected}
+            for sale_id, product_id, sale_date, quantity, total_price, expected
+            in db.audit_sale_prices(args.start, args.end)]}
+
+    if args.command == 'report':
+        if args.month is None:
+            sales = db.get_yearly_sales(args.year)
+        elif 1 <= args.month <= 12:
+            sales = db.get_monthly_sales(args.year, args.month)
+        else:
+            raise CommandError("Bulan tidak valid")
+        return {'sales': [{'name': name, 'quantity': quantity, 'revenue': revenue}
+                          for name, quantity, revenue in sales]}
+
+    if args.command == 'forecast':
+        from forecast import StockForecaster
+        forecaster = StockForecaster(db, lead_time_hours=args.lead_time, cover_hours=args.cover)
+        try:
+            return {'plan': forecaster.plan()}
+        finally:
+            forecaster.close()
+
+    if args.command == 'rebuild-rollup':
+        db.rebuild_sales_rollup()
+        return {}
+
+    if args.command == 'archive':
+        if not 1 <= args.month <= 12:
+            raise CommandError("Bulan tidak valid")
+        count = db.archive_month(args.year, args.month)
+        if args.vacuum:
+            db.compact()
+        return {'month': f'{args.year:04d}-{args.month:02d}', 'sales': count}
+
+    if args.command == 'archives':
+        return {'archives': [{'month': month, 'file': filename, 'sales': count}
+                             for month, _, _, filename, count in db.get_archives()]}
+
+    if args.command == 'journal-rejections':
+        return {'rejections': [{'journal_id': journal_id, 'product_id': product_id, 'quantity': quantity,
+                                'total_price': total_price, 'sale_date': sale_date, 'rejected_at': rejected_at}
+                               for journal_id, product_id, quantity, total_price, sale_date, rejected_at
+                               in db.get_journal_rejections()]}
+
+    raise CommandError("Perintah tidak diisi")
+
+
+def execute(db, args, out, journal=None):
+    # Satu baris output JSON per perintah
+    try:
+        result = {'ok': True, 'command': args.command}
+        result.update(run_command(db, args, journal))
+    except (CommandError, ValueError) as e:
+        result = {'ok': False, 'command': args.command, 'error': str(e)}
+    except Exception as e:
+        # Kesalahan lain (database terkunci, file arsip hilang, ...) hanya menggagalkan
+        # perintah ini; baris script berikutnya tetap dijalankan
+        result = {'ok': False, 'command': args.command, 'error': f"{type(e).__name__}: {e}"}
+    out.write(json.dumps(result) + '\n')
+    return result['ok']
+
+
+def run_script(db, parser, lines, out, journal=None):
+    failures = 0
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            # -h/--help memanggil sys.exit(0) dan mencetak bantuan ke stdout; di script itu
+            # akan menghentikan baris-baris berikutnya dan merusak keluaran JSON per baris
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    args = parser.parse_args(shlex.split(line))
+                except SystemExit:
+                    raise CommandError("-h/--help tidak bisa dipakai di dalam script") from None
+            if args.script or args.db or args.profile or args.journal:
+                raise CommandError("--db, --script, --profile dan --journal hanya boleh dipakai di baris perintah utama")
+        except (CommandError, ValueError) as e:
+            out.write(json.dumps({'ok': False, 'error': str(e), 'line': line}) + '\n')
+            failures += 1
+            continue
+        if not execute(db, args, out, journal):
+            failures += 1
+    return failures
+
+
+def main(argv=None):
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+        if args.script and args.command:
+            raise CommandError("--script tidak bisa digabung dengan perintah")
+    except CommandError as e:
+        parser.print_usage(sys.stderr)
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    db = Database(args.db)
+    instrumentation = None
+    if args.profile:
+        from instrumentation import Instrumentation
+        instrumentation = Instrumentation(db, args.slow_ms).enable()
+    journal = None
+    if args.journal:
+        from journal import SaleJournal
+        journal = SaleJournal(db)
+    try:
+        if args.script == '-':
+            failures = run_script(db, parser, sys.stdin, sys.stdout, journal)
+        elif args.script:
+            with open(args.script, encoding='utf-8') as f:
+                failures = run_script(db, parser, f, sys.stdout, journal)
+        else:
+            failures = 0 if execute(db, args, sys.stdout, journal) else 1
+    finally:
+        if journal:
+            # Sisa entri disimpan sebelum keluar
+            journal.close()
+        if instrumentation:
+            print(instrumentation.format_report(), file=sys.stderr)
+        db.close()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,214 @@
+import glob
+import logging
+import os
 import sqlite3
-from datetime import datetime
+import threading
+from datetime import date, datetime, timezone
+from urllib.parse import quote
+
+logger = logging.getLogger('inventory.database')
+
+DEFAULT_DB_PATH = 'inventory.db'
+# Waktu tunggu (ms) saat database sedang dikunci oleh penulis lain
+BUSY_TIMEOUT_MS = 5000
+# Cache halaman SQLite selama impor massal (KiB)
+BULK_CACHE_KIB = 256 * 1024
+# Stok dan liter penjualan disimpan sebagai integer centiliter, uang sebagai integer rupiah.
+# API Database tetap menerima dan mengembalikan liter; konversi hanya di batas SQL.
+CENTILITERS_PER_LITER = 100
+PRODUCT_COLUMNS = 'p.id, p.name, p.stock / 100.0 AS stock, p.price, p.fuel_type_id, p.created_at'
+# PRAGMA user_version file arsip: 1 = kolom integer (centiliter/rupiah)
+ARCHIVE_VERSION = 1
+ARCHIVE_SALES_COLUMNS = '''
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER,
+    quantity INTEGER NOT NULL,
+    total_price INTEGER NOT NULL,
+    sale_date TIMESTAMP,
+    journal_id TEXT
+'''
+
+class InsufficientStockError(Exception):
+    # Stok produk tidak cukup (atau produk tidak ada) saat penjualan dicatat
+    pass
+
+def format_timestamp(value):
+    # Samakan format dengan CURRENT_TIMESTAMP SQLite (YYYY-MM-DD HH:MM:SS)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+def to_centiliters(liters):
+    return int(round(float(liters) * CENTILITERS_PER_LITER))
+
+def to_rupiah(amount):
+    return int(round(float(amount)))
+
+def sale_total(quantity, price):
+    # Total rupiah untuk quantity liter x harga per liter, dihitung dengan integer
+    return (to_centiliters(quantity) * to_rupiah(price) + CENTILITERS_PER_LITER // 2) // CENTILITERS_PER_LITER
+
+def journal_path(db_path):
+    # File jurnal penjualan berada di samping file database
+    return db_path + '.sales-journal'
+
+def archive_dir(db_path):
+    # Direktori arsip penjualan bulanan berada di samping file database
+    return db_path + '-archive'
+
+def sqlite_uri(path, read_only=False):
+    # URI file SQLite; mode=ro dipakai untuk file arsip
+    return 'file:' + quote(os.path.abspath(path)) + ('?mode=ro' if read_only else '')
+
+def month_range(year, month):
+    # Awal bulan dan awal bulan berikutnya
+    start = date(int(year), int(month), 1)
+    if start.month == 12:
+        end = date(start.year + 1, 1, 1)
+    else:
+        end = date(start.year, start.month + 1, 1)
+    return start, end
 
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect('inventory.db')
-        self.cursor = self.conn.cursor()
-        self.create_tables()
+    def __init__(self, path=None):
+        # Lokasi database bisa diatur lewat argumen atau variabel lingkungan INVENTORY_DB
+        self.path = path or os.environ.get('INVENTORY_DB', DEFAULT_DB_PATH)
+        # Setiap thread memakai koneksi dan cursor sendiri
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # Callback SQL (sqlite3 set_trace_callback) untuk instrumentasi, None = nonaktif
+        self.trace_callback = None
+        # Cache katalog produk dalam proses, dimuat saat pertama dibaca
+        self._catalog = None
+        self._catalog_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Dipanggil setelah penjualan tersimpan: listener(product_id, quantity)
+        self.sale_listeners = []
+        self._fts_enabled = None
+        self.migrate()
+        self.replay_journal()
+    
+    def connect(self):
+        # check_same_thread dimatikan agar close() bisa menutup koneksi milik thread lain;
+        # selama dipakai, koneksi tetap hanya diakses oleh thread pemiliknya
+        # Dibuka sebagai URI agar ATTACH arsip bisa memakai mode=ro
+        conn = sqlite3.connect(sqlite_uri(self.path), uri=True, timeout=BUSY_TIMEOUT_MS / 1000,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+        if self.trace_callback is not None:
+            conn.set_trace_callback(self.trace_callback)
+        return conn
+    
+    def set_trace_callback(self, callback):
+        # Pasang/lepas callback SQL di semua koneksi, termasuk yang dibuat nanti
+        self.trace_callback = callback
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.set_trace_callback(callback)
+    
+    @property
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.connect()
+            self._local.conn = conn
+            self._local.cursor = conn.cursor()
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    @property
+    def cursor(self):
+        self.conn
+        return self._local.cursor
+    
+    def close(self):
+        # Tutup semua koneksi yang pernah dibuka oleh thread mana pun
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+    
+    def _get_catalog(self):
+        # data_version berubah jika koneksi lain (proses lain, instance Database lain, atau
+        # thread lain) meng-commit sejak terakhir dicek lewat koneksi thread ini. Commit dari
+        # koneksi ini sendiri sudah ditulis langsung ke cache (_refresh_products/invalidate).
+        version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+        with self._catalog_lock:
+            if getattr(self._local, 'data_version', None) != version:
+                self._local.data_version = version
+                self._catalog = None
+            if self._catalog is not None:
+                self.cache_hits += 1
+                return self._catalog
+            self.cache_misses += 1
+            self.cursor.execute(f'''
+            SELECT {PRODUCT_COLUMNS}, ft.name as fuel_type_name
+            FROM products p
+            LEFT JOIN fuel_types ft ON p.fuel_type_id = ft.id
+            ORDER BY p.id
+            ''')
+            by_id, by_name, fuel_type_names = {}, {}, {}
+            for row in self.cursor.fetchall():
+                product = row[:-1]
+                by_id[product[0]] = product
+                by_name.setdefault(product[1], product[0])
+                if row[-1] is not None:
+                    fuel_type_names[product[0]] = row[-1]
+            self._catalog = (by_id, by_name, fuel_type_names)
+            return self._catalog
+    
+    def _refresh_products(self, product_ids):
+        # Write-through: muat ulang baris produk yang stok/harganya berubah
+        with self._catalog_lock:
+            if self._catalog is None:
+                return
+            by_id = self._catalog[0]
+            for product_id in set(product_ids):
+                if product_id not in by_id:
+                    continue
+                self.cursor.execute(f'SELECT {PRODUCT_COLUMNS} FROM products p WHERE p.id=?', (product_id,))
+                by_id[product_id] = self.cursor.fetchone()
+    
+    def invalidate_catalog(self):
+        with self._catalog_lock:
+            self._catalog = None
+    
+    def cache_stats(self):
+        return {'hits': self.cache_hits, 'misses': self.cache_misses}
+    
+    def migrate(self):
+        # Database yang sudah versi terbaru tidak menjalankan DDL apa pun
+        self.cursor.execute('PRAGMA user_version')
+        if self.cursor.fetchone()[0] >= len(self.MIGRATIONS):
+            return
+        
+        # Semua migrasi yang tertunda (termasuk data awal) dalam satu transaksi
+        self.cursor.execute('BEGIN IMMEDIATE')
+        try:
+            # Dicek ulang setelah mengunci, proses lain mungkin sudah bermigrasi
+            self.cursor.execute('PRAGMA user_version')
+            version = self.cursor.fetchone()[0]
+            for step in self.MIGRATIONS[version:]:
+                getattr(self, step)()
+            self.cursor.execute(f'PRAGMA user_version = {len(self.MIGRATIONS)}')
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self._fts_enabled = None
+        self.invalidate_catalog()
     
     def create_tables(self):
+        # Migrasi 1: tabel dasar. IF NOT EXISTS tetap dipakai karena database lama
+        # (sebelum ada user_version) sudah memiliki tabel-tabel ini
         # Tabel Kategori BBM
         self.cursor.execute('''
         CREATE TABLE IF NOT EXISTS fuel_types (
@@ -54,62 +255,304 @@ class Database:
             FOREIGN KEY (product_id) REFERENCES products (id)
         )
         ''')
-        self.conn.commit()
 
         # Inisialisasi tipe BBM jika belum ada
         self.initialize_fuel_types()
     
+    def create_sales_date_index(self):
+        # Migrasi 2: index untuk query laporan berdasarkan rentang tanggal
+        self.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sales_date_product ON sales (sale_date, product_id)
+        ''')
+    
+    def create_sales_rollup(self):
+        # Migrasi 3: tabel rekap penjualan harian (diisi otomatis oleh trigger)
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sales_daily_rollup (
+            day TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            total_quantity REAL NOT NULL DEFAULT 0,
+            total_revenue REAL NOT NULL DEFAULT 0,
+            sale_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, product_id)
+        ) WITHOUT ROWID
+        ''')
+        self._create_sales_rollup_trigger()
+
+        # Database lama: isi rekap dari data penjualan yang sudah ada
+        self._fill_sales_rollup()
+    
+    def _create_sales_rollup_trigger(self):
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_sales_daily_rollup AFTER INSERT ON sales
+        WHEN NEW.product_id IS NOT NULL
+        BEGIN
+            INSERT INTO sales_daily_rollup (day, product_id, total_quantity, total_revenue, sale_count)
+            VALUES (date(NEW.sale_date), NEW.product_id, NEW.quantity, NEW.total_price, 1)
+            ON CONFLICT (day, product_id) DO UPDATE SET
+                total_quantity = total_quantity + excluded.total_quantity,
+                total_revenue = total_revenue + excluded.total_revenue,
+                sale_count = sale_count + 1;
+        END
+        ''')
+    
+    def create_search_index(self):
+        # Migrasi 4: index pencarian nama produk (FTS5 trigram), disinkronkan dengan trigger
+        try:
+            self.cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name, content='products', content_rowid='id', tokenize='trigram'
+            )
+            ''')
+        except sqlite3.OperationalError:
+            # SQLite tanpa FTS5/trigram: pencarian kembali memakai LIKE
+            return
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_products_fts_insert AFTER INSERT ON products
+        BEGIN
+            INSERT INTO products_fts (rowid, name) VALUES (NEW.id, NEW.name);
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_products_fts_delete AFTER DELETE ON products
+        BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+        END
+        ''')
+        self.cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_products_fts_update AFTER UPDATE OF name ON products
+        BEGIN
+            INSERT INTO products_fts (products_fts, rowid, name) VALUES ('delete', OLD.id, OLD.name);
+            INSERT INTO products_fts (rowid, name) VALUES (NEW.id, NEW.name);
+        END
+        ''')
+        # Isi index dari produk yang sudah ada
+        self.cursor.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+    
+    def create_price_history_index(self):
+        # Migrasi 5: index untuk mencari harga yang berlaku pada waktu tertentu
+        self.cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_price_history_product_date ON fuel_price_history (product_id, change_date)
+        ''')
+    
+    def add_sales_journal_id(self):
+        # Migrasi 6: ID entri jurnal penjualan agar replay jurnal idempoten
+        self.cursor.execute('PRAGMA table_info(sales)')
+        if 'journal_id' not in [column[1] for column in self.cursor.fetchall()]:
+            self.cursor.execute('ALTER TABLE sales ADD COLUMN journal_id TEXT')
+        self.cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_sales_journal_id ON sales (journal_id) WHERE journal_id IS NOT NULL
+        ''')
+    
+    def create_sales_archives(self):
+        # Migrasi 7: daftar bulan yang penjualannya sudah dipindah ke file arsip
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sales_archives (
+            month TEXT PRIMARY KEY,
+            start_day TEXT NOT NULL,
+            end_day TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+    
+    def use_fixed_point(self):
+        # Migrasi 8: stok/liter sebagai integer centiliter dan uang sebagai integer rupiah.
+        # SQLite tidak bisa mengubah tipe kolom, jadi tabel dibangun ulang lalu index,
+        # trigger, dan index pencarian yang ikut terhapus dibuat kembali.
+        archived = self._convert_archives()
+        
+        self._rebuild_table('products', '''
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            stock INTEGER NOT NULL,
+            price INTEGER NOT NULL,
+            fuel_type_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (fuel_type_id) REFERENCES fuel_types (id)
+        ''', '''
+        SELECT id, name, CAST(ROUND(stock * 100) AS INTEGER), CAST(ROUND(price) AS INTEGER), fuel_type_id, created_at
+        FROM products
+        ''')
+        self._rebuild_table('sales', '''
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER,
+            quantity INTEGER NOT NULL,
+            total_price INTEGER NOT NULL,
+            sale_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            journal_id TEXT,
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        ''', '''
+        SELECT id, product_id, CAST(ROUND(quantity * 100) AS INTEGER), CAST(ROUND(total_price) AS INTEGER),
+               sale_date, journal_id
+        FROM sales
+        ''')
+        self._rebuild_table('fuel_price_history', '''
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER,
+            old_price INTEGER NOT NULL,
+            new_price INTEGER NOT NULL,
+            change_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (product_id) REFERENCES products (id)
+        ''', '''
+        SELECT id, product_id, CAST(ROUND(old_price) AS INTEGER), CAST(ROUND(new_price) AS INTEGER), change_date
+        FROM fuel_price_history
+        ''')
+        
+        # Rekap dihitung ulang dari data yang sudah dikonversi, termasuk bulan arsip
+        self.cursor.execute('DROP TABLE sales_daily_rollup')
+        self.cursor.execute('''
+        CREATE TABLE sales_daily_rollup (
+            day TEXT NOT NULL,
+            product_id INTEGER NOT NULL,
+            total_quantity INTEGER NOT NULL DEFAULT 0,
+            total_revenue INTEGER NOT NULL DEFAULT 0,
+            sale_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, product_id)
+        ) WITHOUT ROWID
+        ''')
+        self._fill_sales_rollup()
+        self.cursor.executemany('''
+        INSERT INTO sales_daily_rollup (day, product_id, total_quantity, total_revenue, sale_count)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (day, product_id) DO UPDATE SET
+            total_quantity = total_quantity + excluded.total_quantity,
+            total_revenue = total_revenue + excluded.total_revenue,
+            sale_count = sale_count + excluded.sale_count
+        ''', archived)
+        
+        self._create_sales_rollup_trigger()
+        self.create_sales_date_index()
+        self.create_price_history_index()
+        self.add_sales_journal_id()
+        self.create_search_index()
+    
+    def _rebuild_table(self, table, columns, select):
+        # Ganti tabel dengan skema baru, data disalin lewat SELECT yang mengonversi nilai
+        self.cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,))
+        row = self.cursor.fetchone()
+        self.cursor.execute(f'CREATE TABLE {table}_new ({columns})')
+        self.cursor.execute(f'INSERT INTO {table}_new {select}')
+        self.cursor.execute(f'DROP TABLE {table}')
+        self.cursor.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+        if row:
+            # AUTOINCREMENT tidak boleh memakai ulang ID yang pernah dihapus
+            self.cursor.execute('UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?', (row[0], table))
+            if self.cursor.rowcount == 0:
+                self.cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (table, row[0]))
+    
+    def _convert_archives(self):
+        # File arsip dikonversi lewat koneksi terpisah (ATTACH tidak bisa di dalam transaksi).
+        # user_version arsip mencegah konversi ganda jika migrasi diulang.
+        # Mengembalikan rekap harian semua bulan arsip.
+        self.cursor.execute('SELECT filename FROM sales_archives')
+        archived = []
+        for (filename,) in self.cursor.fetchall():
+            path = os.path.join(archive_dir(self.path), filename)
+            os.chmod(path, 0o644)
+            archive = sqlite3.connect(path)
+            try:
+                if archive.execute('PRAGMA user_version').fetchone()[0] < ARCHIVE_VERSION:
+                    with archive:
+                        archive.execute(f'CREATE TABLE sales_new ({ARCHIVE_SALES_COLUMNS})')
+                        archive.execute('''
+                        INSERT INTO sales_new
+                        SELECT id, product_id, CAST(ROUND(quantity * 100) AS INTEGER),
+                               CAST(ROUND(total_price) AS INTEGER), sale_date, journal_id
+                        FROM sales ORDER BY sale_date
+                        ''')
+                        archive.execute('DROP TABLE sales')
+                        archive.execute('ALTER TABLE sales_new RENAME TO sales')
+                        archive.execute('CREATE INDEX idx_sales_date_product ON sales (sale_date, product_id)')
+                        archive.execute(f'PRAGMA user_version = {ARCHIVE_VERSION}')
+                    archive.execute('VACUUM')
+                archived.extend(archive.execute('''
+                SELECT date(sale_date), product_id, SUM(quantity), SUM(total_price), COUNT(*)
+                FROM sales
+                WHERE product_id IS NOT NULL
+                GROUP BY date(sale_date), product_id
+                ''').fetchall())
+            finally:
+                archive.close()
+                os.chmod(path, 0o444)
+        return archived
+    
+    def create_journal_rejections(self):
+        # Migrasi 9: entri jurnal yang stoknya sudah habis saat disimpan (mis. terjual lebih
+        # dulu lewat proses lain). Tidak masuk sales dan tidak mengurangi stok, tetapi dicatat
+        # agar bisa ditindaklanjuti; journal_id-nya juga membuat replay jurnal tetap idempoten.
+        self.cursor.execute('''
+        CREATE TABLE IF NOT EXISTS journal_rejections (
+            journal_id TEXT PRIMARY KEY,
+            product_id INTEGER,
+            quantity INTEGER NOT NULL,
+            total_price INTEGER NOT NULL,
+            sale_date TIMESTAMP,
+            rejected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+    
+    # Urutan migrasi skema; PRAGMA user_version = jumlah migrasi yang sudah dijalankan
+    MIGRATIONS = ('create_tables', 'create_sales_date_index', 'create_sales_rollup', 'create_search_index',
+                  'create_price_history_index', 'add_sales_journal_id', 'create_sales_archives', 'use_fixed_point',
+                  'create_journal_rejections')
+    
+    @property
+    def fts_enabled(self):
+        # Dicek sekali saat pencarian pertama, bukan saat startup
+        if self._fts_enabled is None:
+            self.cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+            self._fts_enabled = self.cursor.fetchone() is not None
+        return self._fts_enabled
+    
     def initialize_fuel_types(self):
         # Cek apakah tipe BBM sudah ada
         self.cursor.execute('SELECT COUNT(*) FROM fuel_types')
         count = self.cursor.fetchone()[0]
         
         if count == 0:
-            # Inisialisasi tipe BBM default
+            # Inisialisasi tipe BBM default beserta produknya (nama, deskripsi, harga)
             fuel_types = [
-                ('Pertamax', 'BBM RON 92'),
-                ('Pertalite', 'BBM RON 90'),
-                ('Solar', 'BBM Diesel')
+                ('Pertamax', 'BBM RON 92', 13900),
+                ('Pertalite', 'BBM RON 90', 10000),
+                ('Solar', 'BBM Diesel', 6800)
             ]
-            self.cursor.executemany('INSERT INTO fuel_types (name, description) VALUES (?, ?)', fuel_types)
-            self.conn.commit()
+            self.cursor.executemany('INSERT INTO fuel_types (name, description) VALUES (?, ?)',
+                                    [(name, description) for name, description, _ in fuel_types])
             
             # Tambahkan produk BBM default
-            self.cursor.execute('SELECT id FROM fuel_types WHERE name = ?', ('Pertamax',))
-            pertamax_id = self.cursor.fetchone()[0]
-            self.add_product('Pertamax', 10, 13900, pertamax_id)
-            
-            self.cursor.execute('SELECT id FROM fuel_types WHERE name = ?', ('Pertalite',))
-            pertalite_id = self.cursor.fetchone()[0]
-            self.add_product('Pertalite', 10, 10000, pertalite_id)
-            
-            self.cursor.execute('SELECT id FROM fuel_types WHERE name = ?', ('Solar',))
-            solar_id = self.cursor.fetchone()[0]
-            self.add_product('Solar', 10, 6800, solar_id)
+            self.cursor.executemany('''
+            INSERT INTO products (name, stock, price, fuel_type_id)
+            SELECT ?, 10.0, ?, id FROM fuel_types WHERE name = ?
+            ''', [(name, price, name) for name, _, price in fuel_types])
     
     def add_product(self, name, stock, price, fuel_type_id=None):
-        # Pembulatan stok ke 2 angka desimal
-        stock = round(float(stock), 2)
+        stock = to_centiliters(stock)
+        price = to_rupiah(price)
         
         # Cek apakah produk dengan nama yang sama sudah ada
-        self.cursor.execute('SELECT id FROM products WHERE name = ?', (name,))
-        existing_product = self.cursor.fetchone()
+        existing_id = self._get_catalog()[1].get(name)
         
-        if existing_product:
+        if existing_id is not None:
             # Update stok jika produk sudah ada
-            self.cursor.execute('UPDATE products SET stock = ROUND(stock + ?, 2) WHERE id = ?',
-                               (stock, existing_product[0]))
+            self.cursor.execute('UPDATE products SET stock = stock + ? WHERE id = ?',
+                               (stock, existing_id))
+            self.conn.commit()
+            self._refresh_products([existing_id])
         else:
             # Tambah produk baru
             self.cursor.execute('INSERT INTO products (name, stock, price, fuel_type_id) VALUES (?, ?, ?, ?)',
                                (name, stock, price, fuel_type_id))
-        self.conn.commit()
+            self.conn.commit()
+            self.invalidate_catalog()
     
     def get_fuel_types(self):
         self.cursor.execute('SELECT * FROM fuel_types')
         return self.cursor.fetchall()
     
     def update_fuel_price(self, product_id, new_price):
+        new_price = to_rupiah(new_price)
         # Dapatkan harga lama
         self.cursor.execute('SELECT price FROM products WHERE id = ?', (product_id,))
         old_price = self.cursor.fetchone()[0]
@@ -121,61 +564,703 @@ class Database:
         # Update harga produk
         self.cursor.execute('UPDATE products SET price = ? WHERE id = ?', (new_price, product_id))
         self.conn.commit()
+        self._refresh_products([product_id])
     
-    def get_fuel_products(self):
+    def price_at(self, product_id, ts):
+        # Harga yang berlaku pada waktu ts: perubahan terakhir sebelum/tepat pada ts
+        ts = format_timestamp(ts)
+        self.cursor.execute('''
+        SELECT new_price FROM fuel_price_history
+        WHERE product_id = ? AND change_date <= ?
+        ORDER BY change_date DESC, id DESC LIMIT 1
+        ''', (product_id, ts))
+        row = self.cursor.fetchone()
+        if row:
+            return row[0]
+        
+        # Sebelum perubahan pertama: harga lama dari perubahan berikutnya
         self.cursor.execute('''
-        SELECT p.*, ft.name as fuel_type_name 
-        FROM products p 
-        JOIN fuel_types ft ON p.fuel_type_id = ft.id
+        SELECT old_price FROM fuel_price_history
+        WHERE product_id = ? AND change_date > ?
+        ORDER BY change_date, id LIMIT 1
+        ''', (product_id, ts))
+        row = self.cursor.fetchone()
+        if row:
+            return row[0]
+        
+        # Tidak pernah berubah: harga sekarang
+        product = self.get_product(product_id)
+        return product[3] if product else None
+    
+    def audit_sale_prices(self, start=None, end=None, tolerance=1, chunk_size=1000):
+        # Bandingkan total_price setiap penjualan dengan harga yang berlaku saat itu.
+        # Penjualan (urut sale_date, memakai index) digabung dengan riwayat harga
+        # (urut change_date) dalam satu lintasan, tanpa query per penjualan.
+        # Menghasilkan (sale_id, product_id, sale_date, quantity (liter), total_price, expected_total)
+        
+        # Harga awal tiap produk: harga lama dari perubahan pertamanya, atau harga sekarang
+        prices = {product[0]: product[3] for product in self.get_all_products()}
+        self.cursor.execute('''
+        SELECT product_id, old_price, MIN(change_date)
+        FROM fuel_price_history
+        GROUP BY product_id
         ''')
-        return self.cursor.fetchall()
+        for product_id, old_price, _ in self.cursor.fetchall():
+            prices[product_id] = old_price
+        
+        history = self._iter_query('''
+        SELECT product_id, new_price, change_date FROM fuel_price_history ORDER BY change_date, id
+        ''', (), chunk_size)
+        change = next(history, None)
+        
+        for sale_id, product_id, quantity, total_price, sale_date in self._iter_sales_query('''
+        SELECT s.id, s.product_id, s.quantity, s.total_price, s.sale_date FROM {table} s
+        ''', start, end, chunk_size):
+            while change is not None and change[2] <= sale_date:
+                prices[change[0]] = change[1]
+                change = next(history, None)
+            
+            price = prices.get(product_id)
+            if price is None:
+                continue
+            # quantity dalam centiliter, harga per liter: total dalam rupiah tanpa float
+            expected = (quantity * price + CENTILITERS_PER_LITER // 2) // CENTILITERS_PER_LITER
+            # Penjualan berdasarkan nominal membulatkan liter ke 2 desimal
+            if abs(total_price - expected) > price * 0.005 + tolerance:
+                yield sale_id, product_id, sale_date, quantity / CENTILITERS_PER_LITER, total_price, expected
+    
+    def get_fuel_products(self):
+        # Baris produk ditambah nama tipe BBM, sama seperti JOIN products-fuel_types
+        by_id, _, fuel_type_names = self._get_catalog()
+        return [by_id[product_id] + (fuel_type_name,)
+                for product_id, fuel_type_name in fuel_type_names.items()]
     
     def update_product(self, id, name, stock, price):
-        # Pembulatan stok ke 2 angka desimal
-        stock = round(float(stock), 2)
-        
         self.cursor.execute('UPDATE products SET name=?, stock=?, price=? WHERE id=?',
-                           (name, stock, price, id))
+                           (name, to_centiliters(stock), to_rupiah(price), id))
         self.conn.commit()
+        self.invalidate_catalog()
+    
+    def restock(self, product_id, liters):
+        # Tambah stok secara atomik di SQL; tidak menimpa penjualan dari proses lain
+        # yang belum terlihat oleh cache. Mengembalikan baris produk terbaru, None jika tidak ada
+        self.cursor.execute('UPDATE products SET stock = stock + ? WHERE id = ?',
+                           (to_centiliters(liters), product_id))
+        if self.cursor.rowcount == 0:
+            self.conn.rollback()
+            return None
+        self.conn.commit()
+        self._refresh_products([product_id])
+        return self.get_product(product_id)
     
     def delete_product(self, id):
         self.cursor.execute('DELETE FROM products WHERE id=?', (id,))
         self.conn.commit()
+        self.invalidate_catalog()
     
     def get_all_products(self):
-        self.cursor.execute('SELECT * FROM products')
+        return list(self._get_catalog()[0].values())
+    
+    def get_products_page(self, after_id=0, limit=20):
+        # Keyset pagination: halaman berikutnya setelah ID terakhir yang tampil
+        self.cursor.execute(f'SELECT {PRODUCT_COLUMNS} FROM products p WHERE p.id > ? ORDER BY p.id LIMIT ?',
+                            (after_id, limit))
         return self.cursor.fetchall()
     
+    def get_products_page_before(self, before_id, limit=20):
+        # Halaman sebelumnya: ambil mundur lalu balik urutannya
+        self.cursor.execute(f'SELECT {PRODUCT_COLUMNS} FROM products p WHERE p.id < ? ORDER BY p.id DESC LIMIT ?',
+                            (before_id, limit))
+        return self.cursor.fetchall()[::-1]
+    
     def get_product(self, id):
-        self.cursor.execute('SELECT * FROM products WHERE id=?', (id,))
-        return self.cursor.fetchone()
+        return self._get_catalog()[0].get(id)
+    
+    def get_stock(self, id):
+        # Stok terbaru langsung dari tabel (liter), tanpa cache katalog; None jika produk tidak ada
+        self.cursor.execute('SELECT stock / 100.0 FROM products WHERE id = ?', (id,))
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+    
+    def get_stock_for_journal(self, id, journal_id):
+        # (stok liter atau None, apakah entri jurnal journal_id sudah diproses) dari satu
+        # statement, jadi keduanya berasal dari snapshot yang sama. Dipakai SaleJournal untuk
+        # mengetahui apakah batch yang sedang disimpan sudah mengurangi stok yang terbaca.
+        self.cursor.execute('''
+        SELECT stock / 100.0, EXISTS (SELECT 1 FROM sales WHERE journal_id = ?)
+                              OR EXISTS (SELECT 1 FROM journal_rejections WHERE journal_id = ?)
+        FROM products WHERE id = ?
+        ''', (journal_id, journal_id, id))
+        row = self.cursor.fetchone()
+        return (row[0], bool(row[1])) if row else (None, False)
     
     def get_product_by_name(self, name):
-        self.cursor.execute('SELECT * FROM products WHERE name LIKE ?', ('%' + name + '%',))
+        self.cursor.execute(f'SELECT {PRODUCT_COLUMNS} FROM products p WHERE p.name LIKE ?', ('%' + name + '%',))
+        return self.cursor.fetchall()
+    
+    def search_products(self, query, limit=20):
+        # Cari produk berdasarkan potongan nama; yang diawali query tampil lebih dulu
+        query = query.strip()
+        if not query:
+            return []
+        if not self.fts_enabled or len(query) < 3:
+            # Trigram butuh minimal 3 karakter
+            self.cursor.execute(f'''
+            SELECT {PRODUCT_COLUMNS} FROM products p
+            WHERE p.name LIKE ?
+            ORDER BY p.name NOT LIKE ?, length(p.name), p.id
+            LIMIT ?
+            ''', ('%' + query + '%', query + '%', limit))
+            return self.cursor.fetchall()
+        
+        self.cursor.execute(f'''
+        SELECT {PRODUCT_COLUMNS}
+        FROM products_fts f
+        JOIN products p ON p.id = f.rowid
+        WHERE products_fts MATCH ?
+        ORDER BY p.name NOT LIKE ?, f.rank, p.id
+        LIMIT ?
+        ''', ('"' + query.replace('"', '""') + '"', query + '%', limit))
         return self.cursor.fetchall()
     
     def record_sale(self, product_id, quantity, total_price):
-        # Pembulatan quantity ke 2 angka desimal
-        quantity = round(float(quantity), 2)
+        centiliters = to_centiliters(quantity)
         
-        # Kurangi stok
-        self.cursor.execute('UPDATE products SET stock = ROUND(stock - ?, 2) WHERE id = ?',
-                           (quantity, product_id))
+        # Kurangi stok hanya jika masih cukup; cek dan kurangi dalam satu statement
+        # sehingga dua pompa yang menjual bersamaan tidak bisa membuat stok minus
+        self.cursor.execute('UPDATE products SET stock = stock - ? WHERE id = ? AND stock >= ?',
+                           (centiliters, product_id, centiliters))
+        if self.cursor.rowcount == 0:
+            self.conn.rollback()
+            self._refresh_products([product_id])
+            raise InsufficientStockError(
+                f"Stok produk {product_id} tidak mencukupi untuk {centiliters / CENTILITERS_PER_LITER}")
         
         # Catat penjualan
         self.cursor.execute('INSERT INTO sales (product_id, quantity, total_price) VALUES (?, ?, ?)',
-                           (product_id, quantity, total_price))
+                           (product_id, centiliters, to_rupiah(total_price)))
         self.conn.commit()
+        self._refresh_products([product_id])
+        for listener in self.sale_listeners:
+            listener(product_id, centiliters / CENTILITERS_PER_LITER)
     
-    def get_monthly_sales(self, year, month):
+    def record_sales(self, sales):
+        # Catat banyak penjualan sekaligus dalam satu transaksi (satu commit per batch).
+        # sales: iterable berisi (product_id, quantity, total_price). Stok dicek per baris
+        # seperti record_sale; penjualan yang stoknya tidak cukup hanya ditolak sendiri, tidak
+        # membatalkan yang lain. Mengembalikan sale_id per penjualan, None jika ditolak.
+        rows = [(product_id, to_centiliters(quantity), to_rupiah(total_price))
+                for product_id, quantity, total_price in sales]
+        if not rows:
+            return []
+        
+        results = []
+        try:
+            for product_id, quantity, total_price in rows:
+                self.cursor.execute('UPDATE products SET stock = stock - ? WHERE id = ? AND stock >= ?',
+                                    (quantity, product_id, quantity))
+                if self.cursor.rowcount == 0:
+                    results.append(None)
+                    continue
+                self.cursor.execute('INSERT INTO sales (product_id, quantity, total_price) VALUES (?, ?, ?)',
+                                    (product_id, quantity, total_price))
+                results.append(self.cursor.lastrowid)
+            self.conn.commit()
+        except BaseException:
+            # Transaksi tidak boleh tertinggal terbuka (mis. di koneksi worker AsyncDatabase)
+            self.conn.rollback()
+            self._refresh_products(product_id for product_id, _, _ in rows)
+            raise
+        self._refresh_products(product_id for product_id, _, _ in rows)
+        for listener in self.sale_listeners:
+            for (product_id, quantity, _), sale_id in zip(rows, results):
+                if sale_id is not None:
+                    listener(product_id, quantity / CENTILITERS_PER_LITER)
+        return results
+    
+    def apply_journal_entries(self, entries):
+        # Simpan entri jurnal penjualan dalam satu transaksi (group commit).
+        # entries: iterable (journal_id, product_id, quantity, total_price, sale_date).
+        # Entri yang journal_id-nya sudah ada di sales atau journal_rejections dilewati,
+        # sehingga aman diulang. SaleJournal.record_sale hanya mengecek stok saat penjualan
+        # dikonfirmasi; proses lain bisa menjual stok yang sama sebelum jurnal disimpan.
+        # Karena itu stok dikurangi per entri dengan syarat yang sama seperti record_sale, dan
+        # entri yang stoknya sudah tidak cukup dicatat di journal_rejections, bukan di sales.
+        # Mengembalikan jumlah entri yang masuk ke sales.
+        pending = {}
+        for journal_id, product_id, quantity, total_price, sale_date in entries:
+            pending[journal_id] = (journal_id, product_id, to_centiliters(quantity), to_rupiah(total_price), sale_date)
+        if not pending:
+            return 0
+        
+        try:
+            self.cursor.execute('BEGIN IMMEDIATE')
+            ids = list(pending)
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                self.cursor.execute(f'''
+                SELECT journal_id FROM sales WHERE journal_id IN ({placeholders})
+                UNION ALL
+                SELECT journal_id FROM journal_rejections WHERE journal_id IN ({placeholders})
+                ''', chunk + chunk)
+                for (journal_id,) in self.cursor.fetchall():
+                    del pending[journal_id]
+            
+            rows = []
+            rejected = []
+            for row in pending.values():
+                _, product_id, quantity, _, _ = row
+                self.cursor.execute('UPDATE products SET stock = stock - ? WHERE id = ? AND stock >= ?',
+                                    (quantity, product_id, quantity))
+                (rows if self.cursor.rowcount else rejected).append(row)
+            self.cursor.executemany('''
+            INSERT INTO sales (journal_id, product_id, quantity, total_price, sale_date) VALUES (?, ?, ?, ?, ?)
+            ''', rows)
+            self.cursor.executemany('''
+            INSERT INTO journal_rejections (journal_id, product_id, quantity, total_price, sale_date)
+            VALUES (?, ?, ?, ?, ?)
+            ''', rejected)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        
+        if rejected:
+            logger.warning('Stok tidak mencukupi untuk %d entri jurnal, dicatat di journal_rejections',
+                           len(rejected))
+        self._refresh_products(product_id for _, product_id, _, _, _ in rows + rejected)
+        for listener in self.sale_listeners:
+            for _, product_id, quantity, _, _ in rows:
+                listener(product_id, quantity / CENTILITERS_PER_LITER)
+        return len(rows)
+    
+    def replay_journal(self):
+        # Entri jurnal penjualan yang belum tersimpan (mis. setelah crash) diterapkan ulang,
+        # lalu file jurnalnya dihapus. Jurnal yang masih dikunci SaleJournal aktif dilewati.
+        base = journal_path(self.path)
+        if not os.path.exists(base) and not glob.glob(glob.escape(base) + '.*'):
+            return 0
+        from journal import journal_files, read_journal, try_lock
+        count = 0
+        for path in journal_files(self.path):
+            try:
+                f = open(path, encoding='utf-8')
+            except FileNotFoundError:
+                # Sudah diterapkan dan dihapus oleh proses lain
+                continue
+            with f:
+                if not try_lock(f):
+                    continue
+                count += self.apply_journal_entries(read_journal(path))
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        return count
+    
+    def _bulk_pragmas(self, enabled):
+        # Selama impor massal: tanpa fsync dan cache halaman besar. Aman terhadap crash
+        # proses (WAL), hanya listrik padam di tengah impor yang bisa merusak file
+        if enabled:
+            self.cursor.execute('PRAGMA cache_size')
+            self._local.cache_size = self.cursor.fetchone()[0]
+            self.cursor.execute('PRAGMA synchronous = OFF')
+            self.cursor.execute(f'PRAGMA cache_size = {-BULK_CACHE_KIB}')
+            self.cursor.execute('PRAGMA temp_store = MEMORY')
+        else:
+            self.cursor.execute('PRAGMA synchronous = NORMAL')
+            self.cursor.execute(f'PRAGMA cache_size = {self._local.cache_size}')
+            self.cursor.execute('PRAGMA temp_store = DEFAULT')
+    
+    def bulk_load_products(self, batches):
+        # Impor produk massal dalam satu transaksi. batches: iterable berisi list
+        # (name, stock, price, fuel_type_id). Nama yang sudah ada menambah stok, sama seperti add_product.
+        by_name = dict(self._get_catalog()[1])
+        count = 0
+        self._bulk_pragmas(True)
+        try:
+            self.cursor.execute('BEGIN IMMEDIATE')
+            for batch in batches:
+                restock = {}
+                new = {}
+                for name, stock, price, fuel_type_id in batch:
+                    stock = to_centiliters(stock)
+                    if name in by_name:
+                        restock[by_name[name]] = restock.get(by_name[name], 0) + stock
+                    elif name in new:
+                        new[name][1] += stock
+                    else:
+                        new[name] = [name, stock, to_rupiah(price), fuel_type_id]
+                    count += 1
+                self.cursor.executemany('UPDATE products SET stock = stock + ? WHERE id = ?',
+                                        [(stock, product_id) for product_id, stock in restock.items()])
+                if new:
+                    self.cursor.executemany('INSERT INTO products (name, stock, price, fuel_type_id) VALUES (?, ?, ?, ?)',
+                                            list(new.values()))
+                    # ID berurutan karena semua INSERT berada dalam satu transaksi
+                    self.cursor.execute('SELECT last_insert_rowid()')
+                    first_id = self.cursor.fetchone()[0] - len(new) + 1
+                    by_name.update(zip(new, range(first_id, first_id + len(new))))
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            self._bulk_pragmas(False)
+            self.invalidate_catalog()
+        return count
+    
+    def bulk_load_sales(self, batches, update_stock=True):
+        # Impor riwayat penjualan massal dalam satu transaksi (semua atau tidak sama sekali).
+        # batches: iterable berisi list (product_id, quantity, total_price, sale_date).
+        # Index tanggal dan trigger rekap dilepas selama INSERT lalu dibangun ulang sekali
+        # di akhir; stok dikurangi sekali per produk dari total yang diimpor.
+        # sale_listeners tidak dipanggil: data historis bukan penjualan baru.
+        totals = {}
+        count = 0
+        archived = {archive[0] for archive in self.get_archives()}
+        self._bulk_pragmas(True)
+        try:
+            self.cursor.execute('BEGIN IMMEDIATE')
+            self.cursor.execute('SELECT COALESCE(MAX(id), 0) FROM sales')
+            last_id = self.cursor.fetchone()[0]
+            self.cursor.execute('DROP TRIGGER IF EXISTS trg_sales_daily_rollup')
+            self.cursor.execute('DROP INDEX IF EXISTS idx_sales_date_product')
+            
+            for batch in batches:
+                batch = [(product_id, to_centiliters(quantity), to_rupiah(total_price), sale_date)
+                         for product_id, quantity, total_price, sale_date in batch]
+                self.cursor.executemany('''
+                INSERT INTO sales (product_id, quantity, total_price, sale_date) VALUES (?, ?, ?, ?)
+                ''', batch)
+                for product_id, quantity, _, sale_date in batch:
+                    totals[product_id] = totals.get(product_id, 0) + quantity
+                    if archived and str(sale_date)[:7] in archived:
+                        # Baris di tabel sales untuk bulan yang sudah diarsipkan tidak akan terbaca
+                        raise ValueError(f"Penjualan {sale_date} berada di bulan yang sudah diarsipkan")
+                count += len(batch)
+            
+            self.create_sales_date_index()
+            self._create_sales_rollup_trigger()
+            # Rekap harian hanya untuk baris yang baru diimpor
+            self.cursor.execute('''
+            INSERT INTO sales_daily_rollup (day, product_id, total_quantity, total_revenue, sale_count)
+            SELECT date(sale_date), product_id, SUM(quantity), SUM(total_price), COUNT(*)
+            FROM sales
+            WHERE id > ? AND product_id IS NOT NULL
+            GROUP BY date(sale_date), product_id
+            ON CONFLICT (day, product_id) DO UPDATE SET
+                total_quantity = total_quantity + excluded.total_quantity,
+                total_revenue = total_revenue + excluded.total_revenue,
+                sale_count = sale_count + excluded.sale_count
+            ''', (last_id,))
+            if update_stock:
+                self.cursor.executemany('UPDATE products SET stock = stock - ? WHERE id = ?',
+                                        [(quantity, product_id) for product_id, quantity in totals.items()])
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            self._bulk_pragmas(False)
+        self._refresh_products(totals)
+        return count
+    
+    def get_sales_between(self, start, end):
+        # Rentang setengah terbuka [start, end) agar index sale_date bisa dipakai;
+        # bulan yang sudah diarsipkan dijumlahkan dari file arsipnya
+        totals = {}
+        for table, segment_start, segment_end in self._sales_segments(start, end):
+            self.cursor.execute(f'''
+            SELECT p.id, p.name, SUM(s.quantity), SUM(s.total_price)
+            FROM {table} s
+            JOIN products p ON s.product_id = p.id
+            WHERE s.sale_date >= ? AND s.sale_date < ?
+            GROUP BY p.id, p.name
+            ''', (segment_start, segment_end))
+            for product_id, name, quantity, revenue in self.cursor.fetchall():
+                total = totals.setdefault(product_id, [name, 0, 0])
+                total[1] += quantity
+                total[2] += revenue
+        return [(name, quantity / CENTILITERS_PER_LITER, revenue)
+                for name, quantity, revenue in (totals[product_id] for product_id in sorted(totals))]
+    
+    def get_hourly_sales(self, start, end=None):
+        # (product_id, jam epoch UTC, liter) per produk per jam dalam [start, end), urut jam;
+        # bulan yang sudah diarsipkan ikut dijumlahkan dari file arsipnya
+        totals = {}
+        for table, segment_start, segment_end in self._sales_segments(start, end):
+            self.cursor.execute(f'''
+            SELECT product_id, CAST(strftime('%s', sale_date) AS INTEGER) / 3600 AS hour, SUM(quantity)
+            FROM {table}
+            WHERE sale_date >= ? AND sale_date < ? AND product_id IS NOT NULL
+            GROUP BY product_id, hour
+            ''', (segment_start, segment_end))
+            for product_id, hour, quantity in self.cursor.fetchall():
+                totals[hour, product_id] = totals.get((hour, product_id), 0) + quantity
+        return [(product_id, hour, totals[hour, product_id] / CENTILITERS_PER_LITER)
+                for hour, product_id in sorted(totals)]
+    
+    def _iter_query(self, query, params, chunk_size):
+        # Cursor terpisah agar iterasi tidak terganggu query lain di thread yang sama
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+    
+    def _iter_sales_query(self, select, start, end, chunk_size):
+        # Jalankan SELECT ... FROM {table} s ... per segmen, urut sale_date lintas segmen
+        segments = self._sales_segments(start, end)
+        try:
+            for table, segment_start, segment_end in segments:
+                yield from self._iter_query(f'''
+                {select.format(table=table)}
+                WHERE s.sale_date >= ? AND s.sale_date < ?
+                ORDER BY s.sale_date
+                ''', (segment_start, segment_end), chunk_size)
+        finally:
+            segments.close()
+    
+    def iter_sales(self, start=None, end=None, chunk_size=1000):
+        # Stream penjualan (id, product_id, product_name, quantity, total_price, sale_date)
+        select = '''
+        SELECT s.id, s.product_id, p.name, s.quantity / 100.0, s.total_price, s.sale_date
+        FROM {table} s
+        LEFT JOIN products p ON s.product_id = p.id
+        '''
+        if start is None and end is None and not self.get_archives():
+            return self._iter_query(select.format(table='sales') + 'ORDER BY s.id', (), chunk_size)
+        return self._iter_sales_query(select, start, end, chunk_size)
+    
+    def iter_sale_chunks(self, start=None, end=None, product_id=None, chunk_size=100000, localtime=False):
+        # Blok baris (epoch_detik, product_id, quantity, total_price) untuk analitik vektor.
+        # sale_date disimpan dalam UTC; localtime=True menggeser epoch ke jam dinding lokal
+        # (zona waktu proses, variabel TZ) untuk pengelompokan per jam / hari dalam minggu.
+        epoch = "strftime('%s', sale_date, 'localtime')" if localtime else "strftime('%s', sale_date)"
+        where = 'WHERE sale_date >= ? AND sale_date < ? AND product_id IS NOT NULL'
+        if product_id is not None:
+            where += ' AND product_id = ?'
+        segments = self._sales_segments(start, end)
+        try:
+            for table, segment_start, segment_end in segments:
+                params = [segment_start, segment_end] + ([product_id] if product_id is not None else [])
+                cursor = self.conn.cursor()
+                try:
+                    cursor.execute(f'''
+                    SELECT CAST({epoch} AS INTEGER), product_id, quantity / 100.0, total_price
+                    FROM {table}
+                    {where}
+                    ''', params)
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        yield rows
+                finally:
+                    cursor.close()
+        finally:
+            segments.close()
+    
+    def iter_price_history(self, chunk_size=1000):
+        # Stream riwayat harga (id, product_id, product_name, old_price, new_price, change_date)
+        return self._iter_query('''
+        SELECT h.id, h.product_id, p.name, h.old_price, h.new_price, h.change_date
+        FROM fuel_price_history h
+        LEFT JOIN products p ON h.product_id = p.id
+        ORDER BY h.id
+        ''', (), chunk_size)
+    
+    def get_rollup_between(self, start_day, end_day):
+        # Rekap per produk dari tabel harian, rentang hari [start_day, end_day)
         self.cursor.execute('''
-        SELECT p.name, SUM(s.quantity) as total_quantity, SUM(s.total_price) as total_revenue
-        FROM sales s
-        JOIN products p ON s.product_id = p.id
-        WHERE strftime('%Y', s.sale_date) = ? AND strftime('%m', s.sale_date) = ?
+        SELECT p.name, SUM(r.total_quantity) / 100.0 as total_quantity, SUM(r.total_revenue) as total_revenue
+        FROM sales_daily_rollup r
+        JOIN products p ON r.product_id = p.id
+        WHERE r.day >= ? AND r.day < ?
         GROUP BY p.id, p.name
-        ''', (str(year), str(month).zfill(2)))
+        ''', (format_timestamp(start_day), format_timestamp(end_day)))
+        return self.cursor.fetchall()
+    
+    def get_monthly_sales(self, year, month):
+        start, end = month_range(year, month)
+        return self.get_rollup_between(start, end)
+    
+    def get_yearly_sales(self, year):
+        return self.get_rollup_between(date(int(year), 1, 1), date(int(year) + 1, 1, 1))
+    
+    def _fill_sales_rollup(self):
+        # Hitung ulang seluruh rekap harian dari tabel sales (tanpa commit)
+        self.cursor.execute('DELETE FROM sales_daily_rollup')
+        self.cursor.execute('''
+        INSERT INTO sales_daily_rollup (day, product_id, total_quantity, total_revenue, sale_count)
+        SELECT date(sale_date), product_id, SUM(quantity), SUM(total_price), COUNT(*)
+        FROM sales
+        WHERE product_id IS NOT NULL
+        GROUP BY date(sale_date), product_id
+        ''')
+    
+    def rebuild_sales_rollup(self):
+        # Bulan yang sudah diarsipkan dihitung dari file arsipnya (ATTACH tidak bisa di dalam transaksi)
+        archived = []
+        for table, _, _ in self._sales_segments():
+            if table != 'sales':
+                self.cursor.execute(f'''
+                SELECT date(sale_date), product_id, SUM(quantity), SUM(total_price), COUNT(*)
+                FROM {table}
+                WHERE product_id IS NOT NULL
+                GROUP BY date(sale_date), product_id
+                ''')
+                archived.extend(self.cursor.fetchall())
+        try:
+            self._fill_sales_rollup()
+            self.cursor.executemany('''
+            INSERT INTO sales_daily_rollup (day, product_id, total_quantity, total_revenue, sale_count)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (day, product_id) DO UPDATE SET
+                total_quantity = total_quantity + excluded.total_quantity,
+                total_revenue = total_revenue + excluded.total_revenue,
+                sale_count = sale_count + excluded.sale_count
+            ''', archived)
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+    
+    def get_archives(self):
+        # (month 'YYYY-MM', start_day, end_day, filename, row_count) per bulan yang sudah diarsipkan
+        self.cursor.execute('''
+        SELECT month, start_day, end_day, filename, row_count FROM sales_archives ORDER BY start_day
+        ''')
+        return self.cursor.fetchall()
+    
+    def get_journal_rejections(self):
+        # (journal_id, product_id, liter, total_price, sale_date, rejected_at) per entri jurnal
+        # yang ditolak saat disimpan karena stoknya sudah habis
+        self.cursor.execute('''
+        SELECT journal_id, product_id, quantity / 100.0, total_price, sale_date, rejected_at
+        FROM journal_rejections ORDER BY rejected_at, sale_date
+        ''')
         return self.cursor.fetchall()
     
+    def _sales_segments(self, start=None, end=None):
+        # Bagi [start, end) menjadi segmen berurutan (tabel, awal, akhir): 'sales' untuk
+        # data aktif, '<alias>.sales' untuk bulan arsip yang di-ATTACH selama segmennya dibaca
+        start = format_timestamp(start or '0000-01-01')
+        end = format_timestamp(end or '9999-12-31')
+        self.cursor.execute('''
+        SELECT month, start_day, end_day, filename FROM sales_archives
+        WHERE end_day > ? AND start_day < ?
+        ORDER BY start_day
+        ''', (start, end))
+        position = start
+        for month, archive_start, archive_end, filename in self.cursor.fetchall():
+            if position < archive_start:
+                yield 'sales', position, archive_start
+            alias = self._attach_archive(month, filename)
+            try:
+                yield f'{alias}.sales', max(position, archive_start), min(end, archive_end)
+            finally:
+                self._detach_archive(month)
+            position = archive_end
+        if position < end:
+            yield 'sales', position, end
+    
+    def _attach_archive(self, month, filename):
+        # ATTACH read-only; dihitung per thread agar iterasi bertingkat tidak saling melepas
+        attached = getattr(self._local, 'archives', None)
+        if attached is None:
+            attached = self._local.archives = {}
+        if month not in attached:
+            alias = 'archive_' + month.replace('-', '_')
+            path = os.path.join(archive_dir(self.path), filename)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"File arsip {path} tidak ditemukan")
+            self.cursor.execute(f'ATTACH DATABASE ? AS {alias}', (sqlite_uri(path, read_only=True),))
+            attached[month] = [alias, 0]
+        attached[month][1] += 1
+        return attached[month][0]
+    
+    def _detach_archive(self, month):
+        attached = getattr(self._local, 'archives', None)
+        if not attached or month not in attached:
+            # Koneksi sudah ditutup (close()) sebelum iterasi selesai
+            return
+        attached[month][1] -= 1
+        if attached[month][1] == 0:
+            self.cursor.execute(f'DETACH DATABASE {attached[month][0]}')
+            del attached[month]
+    
+    def archive_month(self, year, month, today=None):
+        # Pindahkan penjualan satu bulan yang sudah tutup ke file arsip read-only.
+        # sales_daily_rollup tidak diubah, jadi laporan bulanan/tahunan tetap sama.
+        start, end = month_range(year, month)
+        today = today or datetime.now(timezone.utc).date()
+        key = start.strftime('%Y-%m')
+        if end > today.replace(day=1):
+            raise ValueError(f"Bulan {key} belum tutup")
+        self.cursor.execute('SELECT 1 FROM sales_archives WHERE month = ?', (key,))
+        if self.cursor.fetchone():
+            raise ValueError(f"Bulan {key} sudah diarsipkan")
+        params = (format_timestamp(start), format_timestamp(end))
+        
+        # 1. Salin ke file arsip baru. File baru dianggap ada setelah tercatat di
+        #    sales_archives, jadi sisa percobaan yang gagal boleh ditimpa
+        directory = archive_dir(self.path)
+        os.makedirs(directory, exist_ok=True)
+        filename = f'sales-{key}.db'
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            os.chmod(path, 0o644)
+            os.remove(path)
+        self.cursor.execute('ATTACH DATABASE ? AS archive_new', (sqlite_uri(path),))
+        try:
+            self.cursor.execute(f'CREATE TABLE archive_new.sales ({ARCHIVE_SALES_COLUMNS})')
+            self.cursor.execute(f'PRAGMA archive_new.user_version = {ARCHIVE_VERSION}')
+            self.cursor.execute('''
+            INSERT INTO archive_new.sales (id, product_id, quantity, total_price, sale_date, journal_id)
+            SELECT id, product_id, quantity, total_price, sale_date, journal_id
+            FROM main.sales
+            WHERE sale_date >= ? AND sale_date < ?
+            ORDER BY sale_date
+            ''', params)
+            count = self.cursor.rowcount
+            self.cursor.execute('CREATE INDEX archive_new.idx_sales_date_product ON sales (sale_date, product_id)')
+            self.conn.commit()
+            self.cursor.execute('VACUUM archive_new')
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            self.cursor.execute('DETACH DATABASE archive_new')
+        
+        # 2. Catat arsip dan hapus dari tabel sales dalam satu transaksi
+        try:
+            self.cursor.execute('BEGIN IMMEDIATE')
+            self.cursor.execute('SELECT COUNT(*) FROM sales WHERE sale_date >= ? AND sale_date < ?', params)
+            if self.cursor.fetchone()[0] != count:
+                raise RuntimeError(f"Penjualan bulan {key} berubah selama pengarsipan, silakan ulangi")
+            self.cursor.execute('''
+            INSERT INTO sales_archives (month, start_day, end_day, filename, row_count) VALUES (?, ?, ?, ?, ?)
+            ''', (key, params[0], params[1], filename, count))
+            self.cursor.execute('DELETE FROM sales WHERE sale_date >= ? AND sale_date < ?', params)
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        os.chmod(path, 0o444)
+        return count
+    
+    def compact(self):
+        # Kembalikan halaman kosong (mis. setelah pengarsipan) agar file database dan backup mengecil
+        self.cursor.execute('VACUUM')
+    
     def __del__(self):
-        self.conn.close()
\ No newline at end of file
+        if hasattr(self, '_connections'):
+            self.close()
\ No newline at end of file
@@ -0,0 +1,64 @@
+import argparse
+import csv
+import json
+import sys
+
+from database import Database
+
+SALES_COLUMNS = ['id', 'product_id', 'product_name', 'quantity', 'total_price', 'sale_date']
+PRICE_HISTORY_COLUMNS = ['id', 'product_id', 'product_name', 'old_price', 'new_price', 'change_date']
+
+
+def write_rows(rows, columns, out, fmt='csv'):
+    # Tulis baris satu per satu, tidak pernah menampung seluruh data di memori
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    elif fmt == 'jsonl':
+        for row in rows:
+            out.write(json.dumps(dict(zip(columns, row))) + '\n')
+            count += 1
+    else:
+        raise ValueError(f"Format tidak dikenal: {fmt}")
+    return count
+
+
+def export_sales(db, out, fmt='csv', start=None, end=None, chunk_size=1000):
+    return write_rows(db.iter_sales(start, end, chunk_size), SALES_COLUMNS, out, fmt)
+
+
+def export_price_history(db, out, fmt='csv', chunk_size=1000):
+    return write_rows(db.iter_price_history(chunk_size), PRICE_HISTORY_COLUMNS, out, fmt)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ekspor data penjualan / riwayat harga BBM')
+    parser.add_argument('table', choices=['sales', 'price-history'])
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    parser.add_argument('--output', '-o', help='File tujuan (default: stdout)')
+    parser.add_argument('--start', help='Tanggal awal (YYYY-MM-DD), hanya untuk sales')
+    parser.add_argument('--end', help='Tanggal akhir, eksklusif (YYYY-MM-DD), hanya untuk sales')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--db', help='Lokasi file database')
+    args = parser.parse_args(argv)
+
+    db = Database(args.db)
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.table == 'sales':
+            count = export_sales(db, out, args.format, args.start, args.end, args.chunk_size)
+        else:
+            count = export_price_history(db, out, args.format, args.chunk_size)
+    finally:
+        if args.output:
+            out.close()
+        db.close()
+    print(f"{count} baris diekspor", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+
+from database import format_timestamp, month_range
+
+# Versi skema (PRAGMA user_version) sejak tabel sales_daily_rollup tersedia
+ROLLUP_VERSION = 3
+# Versi skema sejak liter disimpan sebagai integer centiliter
+FIXED_POINT_VERSION = 8
+
+QUERY_ROLLUP = '''
+SELECT p.name, SUM(r.total_quantity) {scale}, SUM(r.total_revenue)
+FROM sales_daily_rollup r
+JOIN products p ON r.product_id = p.id
+WHERE r.day >= ? AND r.day < ?
+GROUP BY p.id, p.name
+'''
+
+# Database stasiun lama yang belum bermigrasi tidak punya rekap harian
+QUERY_SALES = '''
+SELECT p.name, SUM(s.quantity) {scale}, SUM(s.total_price)
+FROM sales s
+JOIN products p ON s.product_id = p.id
+WHERE s.sale_date >= ? AND s.sale_date < ?
+GROUP BY p.id, p.name
+'''
+
+
+def connect_readonly(path):
+    # Mode URI read-only: tanpa migrasi, data awal, atau kunci tulis pada file stasiun
+    uri = 'file:' + quote(os.path.abspath(path)) + '?mode=ro'
+    return sqlite3.connect(uri, uri=True)
+
+
+def station_sales(path, start, end):
+    # Penjualan per produk satu stasiun untuk [start, end): (path, baris, pesan error)
+    try:
+        conn = connect_readonly(path)
+        try:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            query = QUERY_ROLLUP if version >= ROLLUP_VERSION else QUERY_SALES
+            scale = '/ 100.0' if version >= FIXED_POINT_VERSION else ''
+            rows = conn.execute(query.format(scale=scale), (format_timestamp(start), format_timestamp(end))).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return path, [], str(e)
+    return path, rows, None
+
+
+def _station_sales(task):
+    return station_sales(*task)
+
+
+def _run_stations(tasks, workers):
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        yield from map(_station_sales, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Beberapa stasiun per kiriman agar overhead antar-proses tidak mendominasi
+        yield from executor.map(_station_sales, tasks, chunksize=max(1, len(tasks) // (workers * 4)))
+
+
+def find_station_databases(paths):
+    # File .db langsung, atau semua *.db di dalam direktori
+    result = []
+    for path in paths:
+        if os.path.isdir(path):
+            result.extend(sorted(glob.glob(os.path.join(path, '*.db'))))
+        else:
+            result.append(path)
+    return result
+
+
+def federated_sales(paths, start, end, workers=None):
+    # Gabungan penjualan semua stasiun untuk [start, end).
+    # Setiap stasiun dibaca di proses terpisah; hasil parsial kecil (satu baris per produk)
+    # sehingga biaya penggabungan tidak tergantung jumlah transaksi.
+    products = {}
+    stations = []
+    errors = []
+    for path, rows, error in _run_stations([(path, start, end) for path in paths], workers):
+        if error:
+            errors.append({'station': path, 'error': error})
+            continue
+        station_quantity = station_revenue = 0.0
+        for name, quantity, revenue in rows:
+            total = products.setdefault(name, [0.0, 0.0, 0])
+            total[0] += quantity or 0
+            total[1] += revenue or 0
+            total[2] += 1
+            station_quantity += quantity or 0
+            station_revenue += revenue or 0
+        stations.append({'station': path, 'quantity': round(station_quantity, 2),
+                         'revenue': round(station_revenue, 2)})
+
+    return {
+        'products': [{'name': name, 'quantity': round(quantity, 2), 'revenue': round(revenue, 2),
+                      'stations': count}
+                     for name, (quantity, revenue, count) in sorted(products.items())],
+        'stations': stations,
+        'errors': errors,
+    }
+
+
+def federated_monthly_sales(paths, year, month, workers=None):
+    start, end = month_range(year, month)
+    return federated_sales(paths, start, end, workers)
+
+
+def print_report(report, out):
+    print(f"{'Produk':<20} {'Liter':>14} {'Pendapatan':>18} {'Stasiun':>8}", file=out)
+    for row in report['products']:
+        print(f"{row['name']:<20} {row['quantity']:>14,.2f} {row['revenue']:>18,.2f} {row['stations']:>8}",
+              file=out)
+    print(f"\n{'Stasiun':<40} {'Liter':>14} {'Pendapatan':>18}", file=out)
+    for row in report['stations']:
+        print(f"{row['station']:<40} {row['quantity']:>14,.2f} {row['revenue']:>18,.2f}", file=out)
+    for row in report['errors']:
+        print(f"GAGAL {row['station']}: {row['error']}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Laporan penjualan gabungan dari database banyak stasiun')
+    parser.add_argument('databases', nargs='+', help='File database stasiun atau direktori berisi *.db')
+    parser.add_argument('--year', type=int, required=True)
+    parser.add_argument('--month', type=int, help='Bulan; tanpa ini laporan satu tahun penuh')
+    parser.add_argument('--workers', type=int, help='Jumlah proses (default: jumlah CPU)')
+    parser.add_argument('--json', action='store_true', help='Output JSON')
+    args = parser.parse_args(argv)
+
+    paths = find_station_databases(args.databases)
+    if args.month:
+        if not 1 <= args.month <= 12:
+            parser.error('bulan tidak valid')
+        report = federated_monthly_sales(paths, args.year, args.month, args.workers)
+    else:
+        start, _ = month_range(args.year, 1)
+        _, end = month_range(args.year, 12)
+        report = federated_sales(paths, start, end, args.workers)
+
+    if args.json:
+        json.dump(report, sys.stdout)
+        sys.stdout.write('\n')
+    else:
+        print_report(report, sys.stdout)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
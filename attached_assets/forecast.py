@@ -0,0 +1,141 @@
+import math
+import threading
+from datetime import datetime, timedelta, timezone
+
+from database import format_timestamp
+
+SECONDS_PER_HOUR = 3600
+# Horizon maksimum perkiraan stok habis (jam)
+MAX_HORIZON_HOURS = 24 * 30
+
+
+def utc_now():
+    # sale_date memakai CURRENT_TIMESTAMP SQLite (UTC tanpa zona waktu)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def epoch_hour(ts):
+    return int((ts - datetime(1970, 1, 1)).total_seconds()) // SECONDS_PER_HOUR
+
+
+class StockForecaster:
+    # Laju penjualan per produk untuk tiap jam dalam sehari (liter/jam), dihaluskan
+    # secara eksponensial. Riwayat hanya dibaca sekali saat dibuat; sesudahnya setiap
+    # penjualan diperbarui secara inkremental lewat Database.sale_listeners.
+    def __init__(self, db, alpha=0.1, history_days=28, lead_time_hours=24, cover_hours=72):
+        self.db = db
+        # Bobot jam terbaru; satu slot jam diperbarui sekali per hari
+        self.alpha = alpha
+        self.history_days = history_days
+        self.lead_time_hours = lead_time_hours
+        self.cover_hours = cover_hours
+        self._lock = threading.Lock()
+        # product_id -> [laju per jam 0..23], [jumlah pengamatan per jam]
+        self.rates = {}
+        self._observations = {}
+        # Jam (epoch) yang sedang berjalan dan liter yang sudah terjual di jam itu
+        self._open_hour = {}
+        self._open_qty = {}
+        self.load_history()
+        db.sale_listeners.append(self.observe)
+
+    def close(self):
+        # Lepas dari Database.sale_listeners; forecaster sekali pakai harus ditutup
+        # agar listener tidak menumpuk di Database yang berumur panjang
+        if self.observe in self.db.sale_listeners:
+            self.db.sale_listeners.remove(self.observe)
+
+    def load_history(self, now=None):
+        # Agregat per jam untuk beberapa minggu terakhir, termasuk bulan yang sudah diarsipkan
+        now = now or utc_now()
+        rows = self.db.get_hourly_sales(now - timedelta(days=self.history_days))
+        with self._lock:
+            for product_id, hour, quantity in rows:
+                # Mulai dari penjualan pertama produk, bukan awal jendela riwayat
+                self._start(product_id, hour)
+                self._advance(product_id, hour)
+                self._open_qty[product_id] += quantity
+            for product_id in list(self._open_hour):
+                self._advance(product_id, epoch_hour(now))
+
+    def _start(self, product_id, hour):
+        if product_id not in self.rates:
+            self.rates[product_id] = [0.0] * 24
+            self._observations[product_id] = [0] * 24
+            self._open_hour[product_id] = hour
+            self._open_qty[product_id] = 0.0
+
+    def _advance(self, product_id, hour):
+        # Tutup jam-jam yang sudah lewat dan masukkan ke rata-rata eksponensial
+        open_hour = self._open_hour[product_id]
+        if hour - open_hour > 24 * self.history_days:
+            # Jeda sangat panjang: jam kosong lebih lama dari riwayat tidak menambah informasi
+            open_hour = hour - 24 * self.history_days
+            self._open_qty[product_id] = 0.0
+        rates = self.rates[product_id]
+        observations = self._observations[product_id]
+        while open_hour < hour:
+            slot = open_hour % 24
+            quantity = self._open_qty[product_id]
+            if observations[slot] == 0:
+                rates[slot] = quantity
+            else:
+                rates[slot] += self.alpha * (quantity - rates[slot])
+            observations[slot] += 1
+            self._open_qty[product_id] = 0.0
+            open_hour += 1
+        self._open_hour[product_id] = open_hour
+
+    def observe(self, product_id, quantity, ts=None):
+        # O(1) per penjualan (ditambah jam kosong yang terlewati sejak penjualan terakhir)
+        hour = epoch_hour(ts or utc_now())
+        with self._lock:
+            self._start(product_id, hour)
+            self._advance(product_id, hour)
+            self._open_qty[product_id] += quantity
+
+    def hourly_demand(self, product_id, now=None, hours=24):
+        # Perkiraan liter per jam mulai jam sekarang; jam berjalan dikurangi yang sudah terjual
+        hour = epoch_hour(now or utc_now())
+        with self._lock:
+            if product_id not in self.rates:
+                return [0.0] * hours
+            self._advance(product_id, hour)
+            rates = self.rates[product_id]
+            demand = [rates[(hour + i) % 24] for i in range(hours)]
+            demand[0] = max(demand[0] - self._open_qty[product_id], 0.0)
+        return demand
+
+    def hours_to_empty(self, product_id, stock, now=None):
+        # Jam sampai stok habis menurut laju per jam, None jika melewati horizon
+        if stock <= 0:
+            return 0.0
+        remaining = stock
+        for i, demand in enumerate(self.hourly_demand(product_id, now, MAX_HORIZON_HOURS)):
+            if demand >= remaining:
+                return i + remaining / demand
+            remaining -= demand
+        return None
+
+    def plan(self, now=None):
+        # Perkiraan habis dan rekomendasi pemesanan untuk semua produk BBM
+        now = now or utc_now()
+        horizon = int(math.ceil(self.lead_time_hours + self.cover_hours))
+        result = []
+        for product in self.db.get_fuel_products():
+            product_id, name, stock = product[0], product[1], product[2]
+            demand = self.hourly_demand(product_id, now, horizon)
+            hours = self.hours_to_empty(product_id, stock, now)
+            # Pesan cukup untuk waktu pengiriman + masa cakupan, dikurangi stok yang ada
+            reorder = max(sum(demand) - stock, 0.0)
+            result.append({
+                'product_id': product_id,
+                'name': name,
+                'stock': stock,
+                'demand_per_day': round(sum(demand[:24]), 2),
+                'hours_to_empty': None if hours is None else round(hours, 1),
+                'empty_at': None if hours is None else format_timestamp(now + timedelta(hours=hours)),
+                'reorder_now': hours is not None and hours <= self.lead_time_hours,
+                'reorder_quantity': math.ceil(reorder * 100) / 100,
+            })
+        return result
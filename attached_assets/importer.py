@@ -0,0 +1,190 @@
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime, timezone
+
+from database import Database, format_timestamp
+
+# Jumlah baris per executemany; semua batch tetap berada dalam satu transaksi
+DEFAULT_BATCH_SIZE = 50000
+# Pesan baris yang ditolak yang ditampilkan, sisanya hanya dihitung
+MAX_ERROR_MESSAGES = 10
+
+
+def read_records(f, fmt):
+    # (nomor baris, dict kolom) satu per satu dari CSV berheader atau JSON-lines
+    if fmt == 'csv':
+        for line_no, record in enumerate(csv.DictReader(f), start=2):
+            yield line_no, record
+    elif fmt == 'jsonl':
+        for line_no, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError as e:
+                    yield line_no, e
+    else:
+        raise ValueError(f"Format tidak dikenal: {fmt}")
+
+
+def parse_sale_date(value):
+    # sale_date ISO 8601 ('YYYY-MM-DD HH:MM:SS', dengan 'T', atau tanggal saja) menjadi format
+    # CURRENT_TIMESTAMP. Zona waktu eksplisit dikonversi ke UTC seperti CURRENT_TIMESTAMP.
+    if value in (None, ''):
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        raise ValueError(f"sale_date tidak valid: {value!r}") from None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return format_timestamp(parsed)
+
+
+def parse_sales(records, products):
+    # Baris (product_id, quantity, total_price, sale_date) atau (nomor baris, pesan error).
+    # Kolom sama dengan ekspor sales; kolom id diabaikan, produk dicari lewat product_id
+    # lalu product_name.
+    by_id = {product[0] for product in products}
+    by_name = {}
+    for product in products:
+        by_name.setdefault(product[1], product[0])
+    now = format_timestamp(datetime.now(timezone.utc).replace(tzinfo=None))
+    for line_no, record in records:
+        if isinstance(record, Exception):
+            yield None, (line_no, str(record))
+            continue
+        try:
+            product_id = record.get('product_id')
+            if product_id not in (None, ''):
+                product_id = int(product_id)
+                if product_id not in by_id:
+                    raise ValueError(f"produk {product_id} tidak ditemukan")
+            else:
+                product_id = by_name.get(record.get('product_name'))
+                if product_id is None:
+                    raise ValueError(f"produk '{record.get('product_name')}' tidak ditemukan")
+            quantity = round(float(record['quantity']), 2)
+            total_price = float(record['total_price'])
+            if quantity <= 0 or total_price < 0:
+                raise ValueError("jumlah atau harga tidak valid")
+            sale_date = parse_sale_date(record.get('sale_date')) or now
+        except (KeyError, TypeError, ValueError) as e:
+            yield None, (line_no, f"kolom {e} tidak ada" if isinstance(e, KeyError) else str(e))
+            continue
+        yield (product_id, quantity, total_price, sale_date), None
+
+
+def parse_products(records):
+    # Baris (name, stock, price, fuel_type_id) atau (nomor baris, pesan error)
+    for line_no, record in records:
+        if isinstance(record, Exception):
+            yield None, (line_no, str(record))
+            continue
+        try:
+            name = (record.get('name') or '').strip()
+            if not name:
+                raise ValueError("nama produk kosong")
+            stock = float(record['stock'])
+            price = float(record['price'])
+            if stock < 0 or price < 0:
+                raise ValueError("stok atau harga tidak valid")
+            fuel_type_id = record.get('fuel_type_id')
+            fuel_type_id = int(fuel_type_id) if fuel_type_id not in (None, '') else None
+        except (KeyError, TypeError, ValueError) as e:
+            yield None, (line_no, f"kolom {e} tidak ada" if isinstance(e, KeyError) else str(e))
+            continue
+        yield (name, stock, price, fuel_type_id), None
+
+
+class ImportProgress:
+    # Mengelompokkan baris valid menjadi batch, mencatat baris yang ditolak,
+    # dan menampilkan kemajuan ke stderr setelah setiap batch
+    def __init__(self, parsed, batch_size=DEFAULT_BATCH_SIZE, out=None):
+        self.parsed = parsed
+        self.batch_size = batch_size
+        self.out = out
+        self.loaded = 0
+        self.errors = []
+        self.rejected = 0
+        self.started = time.perf_counter()
+
+    def __iter__(self):
+        batch = []
+        for row, error in self.parsed:
+            if error:
+                self.rejected += 1
+                if len(self.errors) < MAX_ERROR_MESSAGES:
+                    self.errors.append(error)
+                continue
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                self._report(len(batch))
+                batch = []
+        if batch:
+            yield batch
+            self._report(len(batch))
+
+    def rate(self):
+        return self.loaded / max(time.perf_counter() - self.started, 1e-9)
+
+    def _report(self, count):
+        self.loaded += count
+        if self.out:
+            self.out.write(f"\r{self.loaded:,} baris ({self.rate():,.0f} baris/detik)")
+            self.out.flush()
+
+
+def import_sales(db, f, fmt='csv', batch_size=DEFAULT_BATCH_SIZE, update_stock=True, progress_out=None):
+    progress = ImportProgress(parse_sales(read_records(f, fmt), db.get_all_products()), batch_size, progress_out)
+    db.bulk_load_sales(progress, update_stock)
+    return progress
+
+
+def import_products(db, f, fmt='csv', batch_size=DEFAULT_BATCH_SIZE, progress_out=None):
+    progress = ImportProgress(parse_products(read_records(f, fmt)), batch_size, progress_out)
+    db.bulk_load_products(progress)
+    return progress
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Impor massal produk / riwayat penjualan dari CSV atau JSON-lines')
+    parser.add_argument('table', choices=['sales', 'products'])
+    parser.add_argument('input', nargs='?', default='-', help="File sumber ('-' untuk stdin)")
+    parser.add_argument('--format', choices=['csv', 'jsonl'],
+                        help='Format file (default: dari ekstensi, csv untuk stdin)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--no-stock-update', action='store_true',
+                        help='Stok produk tidak dikurangi (stok awal sudah memperhitungkan riwayat)')
+    parser.add_argument('--quiet', action='store_true', help='Tanpa tampilan kemajuan')
+    parser.add_argument('--db', help='Lokasi file database')
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('jsonl' if args.input.endswith(('.jsonl', '.json')) else 'csv')
+    db = Database(args.db)
+    f = open(args.input, newline='', encoding='utf-8') if args.input != '-' else sys.stdin
+    progress_out = None if args.quiet else sys.stderr
+    try:
+        if args.table == 'sales':
+            progress = import_sales(db, f, fmt, args.batch_size, not args.no_stock_update, progress_out)
+        else:
+            progress = import_products(db, f, fmt, args.batch_size, progress_out)
+    finally:
+        if args.input != '-':
+            f.close()
+        db.close()
+
+    if progress_out:
+        progress_out.write('\n')
+    for line_no, message in progress.errors:
+        print(f"baris {line_no}: {message}", file=sys.stderr)
+    print(f"{progress.loaded} baris diimpor, {progress.rejected} ditolak "
+          f"({progress.rate():,.0f} baris/detik)", file=sys.stderr)
+    return 1 if progress.rejected else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import functools
+import inspect
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger('inventory.slow_query')
+
+# Histogram latensi berskala log: 4 bucket per kelipatan dua, mulai dari 1 mikrodetik
+BUCKETS_PER_DOUBLING = 4
+MIN_LATENCY = 1e-6
+
+
+class MethodStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = defaultdict(int)
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        if elapsed <= MIN_LATENCY:
+            index = 0
+        else:
+            index = math.ceil(math.log2(elapsed / MIN_LATENCY) * BUCKETS_PER_DOUBLING)
+        self.buckets[index] += 1
+
+    def percentile(self, p):
+        # Batas atas bucket yang memuat persentil ke-p (detik)
+        target = self.count * p / 100
+        running = 0
+        for index in sorted(self.buckets):
+            running += self.buckets[index]
+            if running >= target:
+                return min(MIN_LATENCY * 2 ** (index / BUCKETS_PER_DOUBLING), self.max)
+        return self.max
+
+
+class Instrumentation:
+    # Membungkus method publik sebuah objek Database pada level instance,
+    # sehingga tanpa enable() tidak ada overhead sama sekali
+    def __init__(self, db, slow_ms=100):
+        self.db = db
+        self.slow_threshold = slow_ms / 1000
+        self.stats = defaultdict(MethodStats)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._wrapped = []
+
+    def enable(self):
+        if self._wrapped:
+            return self
+        for name, attr in vars(type(self.db)).items():
+            if name.startswith('_') or not callable(attr) or name in ('close', 'connect', 'set_trace_callback'):
+                continue
+            setattr(self.db, name, self._wrap(name, getattr(self.db, name)))
+            self._wrapped.append(name)
+        self.db.set_trace_callback(self._trace)
+        return self
+
+    def disable(self):
+        for name in self._wrapped:
+            delattr(self.db, name)
+        self._wrapped = []
+        self.db.set_trace_callback(None)
+
+    def _trace(self, statement):
+        # SQL dicatat ke semua pemanggilan yang sedang berjalan di thread ini;
+        # SQLite melaporkan ulang statement pemicu trigger, cukup dicatat sekali
+        for statements in getattr(self._local, 'stack', ()):
+            if not statements or statements[-1] != statement:
+                statements.append(statement)
+
+    def _wrap(self, name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            statements = []
+            elapsed = [0.0]
+            try:
+                result = self._measure(statements, elapsed, method, *args, **kwargs)
+            except BaseException:
+                self._record(name, elapsed[0], statements)
+                raise
+            if inspect.isgenerator(result):
+                # iter_sales dan sejenisnya bekerja saat diiterasi, bukan saat dipanggil
+                return self._wrap_generator(name, result, statements, elapsed)
+            self._record(name, elapsed[0], statements)
+            return result
+        return wrapper
+
+    def _wrap_generator(self, name, generator, statements, elapsed):
+        # Diukur sampai generator habis atau ditutup: hanya waktu di dalam generator,
+        # bukan waktu pemanggil memproses tiap baris
+        try:
+            while True:
+                try:
+                    item = self._measure(statements, elapsed, next, generator)
+                except StopIteration:
+                    return
+                yield item
+        finally:
+            try:
+                self._measure(statements, elapsed, generator.close)
+            finally:
+                self._record(name, elapsed[0], statements)
+
+    def _measure(self, statements, elapsed, fn, *args, **kwargs):
+        # Jalankan fn dengan SQL-nya dicatat ke statements; durasinya ditambahkan ke elapsed[0]
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(statements)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed[0] += time.perf_counter() - start
+            stack.pop()
+
+    def _record(self, name, elapsed, statements):
+        with self._lock:
+            self.stats[name].add(elapsed)
+        if elapsed >= self.slow_threshold:
+            logger.warning('%s lambat (%.1f ms): %s', name, elapsed * 1000,
+                           ' | '.join(' '.join(sql.split()) for sql in statements) or '-')
+
+    def report(self):
+        # Baris: (method, jumlah panggilan, total, p50, p95, p99) dalam detik
+        with self._lock:
+            rows = [(name, s.count, s.total, s.percentile(50), s.percentile(95), s.percentile(99))
+                    for name, s in self.stats.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def format_report(self):
+        lines = [f"{'Method':<26} {'Jumlah':>8} {'Total ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+        for name, count, total, p50, p95, p99 in self.report():
+            lines.append(f"{name:<26} {count:>8} {total * 1000:>10.2f} {p50 * 1000:>8.3f} "
+                         f"{p95 * 1000:>8.3f} {p99 * 1000:>8.3f}")
+        return '\n'.join(lines)
@@ -0,0 +1,182 @@
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from database import InsufficientStockError, format_timestamp, journal_path, to_centiliters
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: tanpa kunci antar-proses. File jurnal yang masih dibuka tidak bisa dihapus
+    # di sana, dan entri yang terbaca dua kali dilewati lewat journal_id.
+    fcntl = None
+
+logger = logging.getLogger('inventory.journal')
+
+
+def journal_files(db_path):
+    # Semua file jurnal milik database: satu per SaleJournal, ditambah nama lama tanpa akhiran
+    base = journal_path(db_path)
+    return sorted(path for path in [base] + glob.glob(glob.escape(base) + '.*') if os.path.isfile(path))
+
+
+def try_lock(f):
+    # Kunci eksklusif tanpa menunggu; False jika file masih dipegang SaleJournal lain.
+    # Kunci dilepas otomatis saat file ditutup atau prosesnya mati (termasuk crash).
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def read_journal(path):
+    # Entri (journal_id, product_id, quantity, total_price, sale_date) dari file jurnal
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Baris terakhir terpotong karena crash sebelum selesai ditulis (belum dikonfirmasi)
+                continue
+            yield entry['id'], entry['product_id'], entry['quantity'], entry['total_price'], entry['sale_date']
+
+
+class SaleJournal:
+    # Jurnal penjualan append-only di depan Database. record_sale menulis ke file jurnal
+    # dan langsung kembali; thread latar belakang menyimpan entri ke sales/products dalam
+    # batch (satu transaksi per batch). Entri yang belum tersimpan saat crash diterapkan
+    # ulang oleh Database.replay_journal() saat startup berikutnya.
+    # Setiap SaleJournal menulis ke file jurnalnya sendiri yang dikunci selama dipakai,
+    # sehingga beberapa proses (mis. perintah --journal bersamaan) tidak saling menimpa.
+    # Stok dicek saat penjualan dikonfirmasi; jika proses lain menjual stok yang sama sebelum
+    # entri disimpan, entri itu masuk journal_rejections (lihat Database.apply_journal_entries).
+    def __init__(self, db, batch_size=500, flush_interval=0.05, retry_interval=0.5, durable=True):
+        self.db = db
+        self.batch_size = batch_size
+        # Waktu tunggu untuk mengumpulkan batch sebelum disimpan (detik)
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        # fsync setiap entri agar penjualan yang sudah dikonfirmasi tidak hilang saat listrik padam
+        self.durable = durable
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._pending = []
+        # Centiliter yang sudah dijual lewat jurnal tetapi belum mengurangi products.stock
+        self._reserved = {}
+        # Batch yang sedang disimpan flusher (di luar lock) dan centiliternya per produk
+        self._inflight = None
+        self._inflight_reserved = {}
+        self._stopping = False
+
+        # Sisa jurnal proses yang sudah berhenti disimpan dulu
+        db.replay_journal()
+        # File dikunci dengan nama sementara lalu diganti nama, agar replay di proses lain
+        # tidak pernah melihat file jurnal baru yang belum terkunci
+        suffix = uuid.uuid4().hex[:16]
+        self.path = f'{journal_path(db.path)}.{suffix}'
+        new_path = f'{journal_path(db.path)}-new.{suffix}'
+        self._file = open(new_path, 'a', encoding='utf-8')
+        try_lock(self._file)
+        os.replace(new_path, self.path)
+        self._thread = threading.Thread(target=self._run, name='sale-journal-flusher', daemon=True)
+        self._thread.start()
+
+    def record_sale(self, product_id, quantity, total_price):
+        # Konfirmasi penjualan tanpa menunggu SQLite; mengembalikan journal_id
+        quantity = round(float(quantity), 2)
+        centiliters = to_centiliters(quantity)
+        sale_date = format_timestamp(datetime.now(timezone.utc).replace(tzinfo=None))
+        with self._lock:
+            if self._stopping:
+                raise RuntimeError("Jurnal penjualan sudah ditutup")
+            # Stok dibaca ulang dari database (bukan cache) agar penjualan proses lain ikut
+            # terhitung. Selama flusher menyimpan batch di luar lock, stok yang terbaca bisa
+            # sudah atau belum dikurangi batch itu; statusnya dibaca dari snapshot yang sama
+            # sehingga batch tersebut tidak dihitung dua kali.
+            reserved = self._reserved.get(product_id, 0)
+            unapplied = reserved
+            if self._inflight is None:
+                stock = self.db.get_stock(product_id)
+            else:
+                stock, applied = self.db.get_stock_for_journal(product_id, self._inflight[0][0])
+                if applied:
+                    unapplied -= self._inflight_reserved.get(product_id, 0)
+            if stock is None or to_centiliters(stock) - unapplied < centiliters:
+                raise InsufficientStockError(f"Stok produk {product_id} tidak mencukupi untuk {quantity}")
+            entry = (uuid.uuid4().hex, product_id, quantity, total_price, sale_date)
+            self._file.write(json.dumps({'id': entry[0], 'product_id': product_id, 'quantity': quantity,
+                                         'total_price': total_price, 'sale_date': sale_date}) + '\n')
+            self._file.flush()
+            if self.durable:
+                os.fsync(self._file.fileno())
+            self._pending.append(entry)
+            self._reserved[product_id] = reserved + centiliters
+            if len(self._pending) >= self.batch_size:
+                self._changed.notify_all()
+        return entry[0]
+
+    def _run(self):
+        while True:
+            with self._lock:
+                self._changed.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending:
+                    return
+                # Beri waktu penjualan lain masuk ke batch yang sama
+                self._changed.wait_for(lambda: len(self._pending) >= self.batch_size or self._stopping,
+                                       timeout=self.flush_interval)
+                batch = self._pending[:self.batch_size]
+                self._inflight = batch
+                self._inflight_reserved = {}
+                for _, product_id, quantity, _, _ in batch:
+                    self._inflight_reserved[product_id] = (self._inflight_reserved.get(product_id, 0)
+                                                           + to_centiliters(quantity))
+
+            try:
+                self.db.apply_journal_entries(batch)
+            except sqlite3.Error as e:
+                # Database sibuk (backup, laporan panjang): coba lagi nanti, entri tetap di jurnal
+                logger.warning('Gagal menyimpan %d entri jurnal, dicoba lagi: %s', len(batch), e)
+                time.sleep(self.retry_interval)
+                continue
+
+            with self._lock:
+                del self._pending[:len(batch)]
+                for product_id, centiliters in self._inflight_reserved.items():
+                    self._reserved[product_id] -= centiliters
+                self._inflight = None
+                self._inflight_reserved = {}
+                if not self._pending:
+                    # Semua entri sudah tersimpan, jurnal bisa dikosongkan
+                    self._file.seek(0)
+                    self._file.truncate()
+                self._changed.notify_all()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, timeout=None):
+        # Tunggu sampai semua entri tersimpan ke database
+        with self._lock:
+            self._changed.notify_all()
+            return self._changed.wait_for(lambda: not self._pending, timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            self._stopping = True
+            self._changed.notify_all()
+        self._thread.join()
+        with self._lock:
+            # Dihapus sebelum ditutup (kunci dilepas), selagi masih dipegang proses ini
+            if not self._pending:
+                os.remove(self.path)
+            self._file.close()
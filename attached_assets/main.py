@@ -1,15 +1,43 @@
-from database import Database
-from datetime import datetime
+from database import Database, InsufficientStockError, month_range, sale_total, to_rupiah
+from datetime import datetime, timedelta
+import math
 import os
+import sys
 import time
-from colorama import init, Fore, Back, Style
 
-# Inisialisasi colorama
-init()
+# Warna terminal dimuat saat aplikasi interaktif dibuat (lihat init_warna)
+Fore = Style = None
+
+def init_warna():
+    # Inisialisasi colorama hanya untuk mode interaktif
+    global Fore, Style
+    if Fore is None:
+        import colorama
+        colorama.init()
+        Fore, Style = colorama.Fore, colorama.Style
 
 class InventoryApp:
+    # Jumlah produk per halaman pada daftar produk
+    page_size = 20
+    
     def __init__(self):
+        init_warna()
         self.db = Database()
+        # Instrumentasi latensi aktif jika INVENTORY_PROFILE diisi (ms batas query lambat)
+        self.instrumentation = None
+        if os.environ.get('INVENTORY_PROFILE'):
+            from instrumentation import Instrumentation
+            slow_ms = float(os.environ.get('INVENTORY_SLOW_MS', 100))
+            self.instrumentation = Instrumentation(self.db, slow_ms).enable()
+        # Perkiraan stok dibuat saat pertama dibutuhkan, lalu diperbarui setiap penjualan
+        self._forecaster = None
+    
+    @property
+    def forecaster(self):
+        if self._forecaster is None:
+            from forecast import StockForecaster
+            self._forecaster = StockForecaster(self.db)
+        return self._forecaster
     
     def tampilkan_menu(self):
         print(f"\n{Fore.CYAN}=== SISTEM MANAJEMEN INVENTORI ==={Style.RESET_ALL}")
@@ -22,22 +50,24 @@ class InventoryApp:
         print(f"{Fore.GREEN}6. Penjualan BBM{Style.RESET_ALL}")
         print(f"{Fore.GREEN}7. Tambah Stok BBM{Style.RESET_ALL}")
         print(f"{Fore.GREEN}8. Update Harga BBM{Style.RESET_ALL}")
+        print(f"\n{Fore.CYAN}=== LAPORAN ==={Style.RESET_ALL}")
+        print(f"{Fore.GREEN}9. Laporan Tahunan{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}10. Heatmap Penjualan per Jam{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}11. Tren Harian & Pola Hari{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}12. Perbandingan Tahun ke Tahun{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}13. Perkiraan Stok & Rencana Pemesanan BBM{Style.RESET_ALL}")
         print(f"\n{Fore.RED}0. Keluar{Style.RESET_ALL}")
         print(f"{Fore.CYAN}================================{Style.RESET_ALL}")
         print(f"{Fore.YELLOW}Ketik 'kembali' pada input untuk kembali ke menu utama{Style.RESET_ALL}")
     
-    def lihat_produk(self):
-        print(f"\n{Fore.CYAN}=== DAFTAR PRODUK ==={Style.RESET_ALL}")
-        products = self.db.get_all_products()
-        if not products:
-            print(f"{Fore.RED}Tidak ada produk{Style.RESET_ALL}")
-            return
-        
-        # Menghitung lebar maksimum untuk setiap kolom
-        max_id_width = max(len(str(product[0])) for product in products)
-        max_nama_width = max(len(str(product[1])) for product in products)
-        max_stok_width = max(len(str(product[2])) for product in products)
-        max_harga_width = max(len(f"Rp {product[3]}") for product in products)
+    def tampilkan_tabel_produk(self, products):
+        # Menghitung lebar kolom hanya dari baris yang tampil
+        max_id_width = max_nama_width = max_stok_width = max_harga_width = 0
+        for product in products:
+            max_id_width = max(max_id_width, len(str(product[0])))
+            max_nama_width = max(max_nama_width, len(str(product[1])))
+            max_stok_width = max(max_stok_width, len(str(product[2])))
+            max_harga_width = max(max_harga_width, len(f"Rp {product[3]}"))
         
         # Header
         header = f"{Fore.WHITE}{'ID'.ljust(max_id_width)} | {'Nama'.ljust(max_nama_width)} | {'Stok'.ljust(max_stok_width)} | {'Harga'}{Style.RESET_ALL}"
@@ -47,9 +77,43 @@ class InventoryApp:
         # Data produk
         for product in products:
             print(f"{Fore.WHITE}{str(product[0]).ljust(max_id_width)} | {str(product[1]).ljust(max_nama_width)} | {str(product[2]).ljust(max_stok_width)} | Rp {str(product[3])}{Style.RESET_ALL}")
+    
+    def lihat_produk(self):
+        print(f"\n{Fore.CYAN}=== DAFTAR PRODUK ==={Style.RESET_ALL}")
+        halaman = self.db.get_products_page(0, self.page_size)
+        if not halaman:
+            print(f"{Fore.RED}Tidak ada produk{Style.RESET_ALL}")
+            return
         
-        input_kembali = input(f"\n{Fore.YELLOW}Tekan Enter untuk kembali ke menu utama...{Style.RESET_ALL}")
-        return
+        while True:
+            self.tampilkan_tabel_produk(halaman)
+            perintah = input(f"\n{Fore.YELLOW}[n] Berikutnya  [p] Sebelumnya  [j ID] Lompat ke ID  Enter: selesai > {Style.RESET_ALL}").strip().lower()
+            
+            if perintah == 'n':
+                berikutnya = self.db.get_products_page(halaman[-1][0], self.page_size)
+                if berikutnya:
+                    halaman = berikutnya
+                else:
+                    print(f"{Fore.YELLOW}Sudah di halaman terakhir{Style.RESET_ALL}")
+            elif perintah == 'p':
+                sebelumnya = self.db.get_products_page_before(halaman[0][0], self.page_size)
+                if sebelumnya:
+                    halaman = sebelumnya
+                else:
+                    print(f"{Fore.YELLOW}Sudah di halaman pertama{Style.RESET_ALL}")
+            elif perintah.startswith('j'):
+                try:
+                    id_tujuan = int(perintah[1:].strip() or input(f"{Fore.GREEN}Lompat ke ID: {Style.RESET_ALL}"))
+                except ValueError:
+                    print(f"{Fore.RED}Error: Masukkan ID yang valid{Style.RESET_ALL}")
+                    continue
+                tujuan = self.db.get_products_page(id_tujuan - 1, self.page_size)
+                if tujuan:
+                    halaman = tujuan
+                else:
+                    print(f"{Fore.YELLOW}Tidak ada produk dengan ID {id_tujuan} atau lebih{Style.RESET_ALL}")
+            else:
+                return
     
     def tambah_produk(self):
         print(f"\n{Fore.CYAN}=== TAMBAH PRODUK ==={Style.RESET_ALL}")
@@ -118,7 +182,7 @@ class InventoryApp:
                 nama_input = input(f"{Fore.GREEN}Masukkan nama produk (atau 'kembali' untuk ke menu utama): {Style.RESET_ALL}")
                 if nama_input.lower() == 'kembali':
                     return
-                produk_list = self.db.get_product_by_name(nama_input)
+                produk_list = self.db.search_products(nama_input)
                 if not produk_list:
                     print(f"{Fore.RED}Error: Produk tidak ditemukan{Style.RESET_ALL}")
                     return
@@ -140,12 +204,15 @@ class InventoryApp:
             
             jumlah = int(input(f"{Fore.GREEN}Jumlah: {Style.RESET_ALL}"))
             
-            if produk[2] >= jumlah and jumlah > 0:
+            if jumlah > 0:
                 total_harga = jumlah * produk[3]
+                # Stok dicek ulang secara atomik oleh record_sale
                 self.db.record_sale(id_produk, jumlah, total_harga)
                 print(f"{Fore.GREEN}Penjualan berhasil dicatat! Total: Rp {total_harga}{Style.RESET_ALL}")
             else:
                 print(f"{Fore.RED}Error: Stok tidak mencukupi atau jumlah tidak valid{Style.RESET_ALL}")
+        except InsufficientStockError:
+            print(f"{Fore.RED}Error: Stok tidak mencukupi atau jumlah tidak valid{Style.RESET_ALL}")
         except ValueError:
             print(f"{Fore.RED}Error: Masukkan angka yang valid{Style.RESET_ALL}")
         
@@ -182,6 +249,160 @@ class InventoryApp:
         input_kembali = input(f"\n{Fore.YELLOW}Tekan Enter untuk kembali ke menu utama...{Style.RESET_ALL}")
         return
     
+    def laporan_tahunan(self):
+        print(f"\n{Fore.CYAN}=== LAPORAN TAHUNAN ==={Style.RESET_ALL}")
+        try:
+            tahun_input = input(f"{Fore.GREEN}Masukkan tahun (YYYY) atau 'kembali' untuk ke menu utama: {Style.RESET_ALL}")
+            if tahun_input.lower() == 'kembali':
+                return
+            
+            tahun = int(tahun_input)
+            if tahun > 0:
+                print(f"\n{Fore.CYAN}=== LAPORAN PENJUALAN TAHUN {tahun} ==={Style.RESET_ALL}")
+                sales = self.db.get_yearly_sales(tahun)
+                
+                if not sales:
+                    print(f"{Fore.YELLOW}Tidak ada data penjualan{Style.RESET_ALL}")
+                    return
+                
+                print(f"{Fore.WHITE}Produk\t\tJumlah\tTotal Pendapatan{Style.RESET_ALL}")
+                print("-" * 50)
+                for sale in sales:
+                    print(f"{Fore.WHITE}{sale[0]}\t\t{sale[1]}\tRp {sale[2]}{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.RED}Error: Tahun tidak valid{Style.RESET_ALL}")
+        except ValueError:
+            print(f"{Fore.RED}Error: Masukkan angka yang valid{Style.RESET_ALL}")
+        
+        input_kembali = input(f"\n{Fore.YELLOW}Tekan Enter untuk kembali ke menu utama...{Style.RESET_ALL}")
+        return
+    
+    def muat_analitik(self):
+        # Modul analitik membutuhkan NumPy; dimuat hanya saat layar analitik dibuka
+        try:
+            from analytics import SalesAnalytics
+        except ImportError:
+            print(f"{Fore.RED}Error: Analitik membutuhkan NumPy (pip install numpy){Style.RESET_ALL}")
+            return None
+        return SalesAnalytics(self.db)
+    
+    def input_bulan(self):
+        # Mengembalikan (tahun, bulan) atau None jika kembali/tidak valid
+        tahun_input = input(f"{Fore.GREEN}Masukkan tahun (YYYY) atau 'kembali' untuk ke menu utama: {Style.RESET_ALL}")
+        if tahun_input.lower() == 'kembali':
+            return None
+        tahun = int(tahun_input)
+        bulan = int(input(f"{Fore.GREEN}Masukkan bulan (1-12): {Style.RESET_ALL}"))
+        if not (1 <= bulan <= 12 and tahun > 0):
+            print(f"{Fore.RED}Error: Bulan atau tahun tidak valid{Style.RESET_ALL}")
+            return None
+        return tahun, bulan
+    
+    def heatmap_penjualan(self):
+        print(f"\n{Fore.CYAN}=== HEATMAP PENJUALAN PER JAM ==={Style.RESET_ALL}")
+        try:
+            analitik = self.muat_analitik()
+            periode = analitik and self.input_bulan()
+            if periode:
+                from analytics import NAMA_HARI
+                start, end = month_range(*periode)
+                heatmap = analitik.hourly_heatmap(start, end)
+                puncak = heatmap.max()
+                if puncak <= 0:
+                    print(f"{Fore.YELLOW}Tidak ada data penjualan{Style.RESET_ALL}")
+                else:
+                    # Intensitas liter terjual: ' ' (kosong) sampai '@' (tertinggi)
+                    skala = ' .:-=+*#%@'
+                    print(f"\n{Fore.CYAN}=== LITER TERJUAL {periode[1]}/{periode[0]} ==={Style.RESET_ALL}")
+                    print(f"{Fore.WHITE}{'':<8}" + ''.join(f"{jam:>3}" for jam in range(24)) + f"{Style.RESET_ALL}")
+                    for hari, baris in zip(NAMA_HARI, heatmap):
+                        sel = ''.join(f"{skala[int(nilai / puncak * (len(skala) - 1))]:>3}" for nilai in baris)
+                        print(f"{Fore.WHITE}{hari:<8}{sel}{Style.RESET_ALL}")
+                    hari_puncak, jam_puncak = divmod(int(heatmap.argmax()), 24)
+                    print(f"\n{Fore.WHITE}Puncak: {NAMA_HARI[hari_puncak]} jam {jam_puncak:02d}:00 ({puncak:.2f} liter){Style.RESET_ALL}")
+        except ValueError:
+            print(f"{Fore.RED}Error: Masukkan angka yang valid{Style.RESET_ALL}")
+        
+        input_kembali = input(f"\n{Fore.YELLOW}Tekan Enter untuk kembali ke menu utama...{Style.RESET_ALL}")
+        return
+    
+    def tren_harian(self):
+        print(f"\n{Fore.CYAN}=== TREN HARIAN & POLA HARI ==={Style.RESET_ALL}")
+        try:
+            analitik = self.muat_analitik()
+            periode = analitik and self.input_bulan()
+            if periode:
+                from analytics import NAMA_HARI
+                start, end = month_range(*periode)
+                # Mulai 6 hari lebih awal agar setiap hari di bulan ini punya rata-rata 7 hari
+                hari, harian, rata_rata = analitik.trend(start - timedelta(days=6), end, window=7)
+                print(f"\n{Fore.WHITE}Tanggal\t\tLiter\tRata-rata 7 hari{Style.RESET_ALL}")
+                print("-" * 50)
+                for tanggal, liter, rata in zip(hari[6:], harian[6:], rata_rata):
+                    print(f"{Fore.WHITE}{tanggal}\t{liter:.2f}\t{rata:.2f}{Style.RESET_ALL}")
+                
+                transaksi, liter, pendapatan = analitik.weekday_pattern(start, end)
+                print(f"\n{Fore.WHITE}Hari\t\tTransaksi\tLiter\tPendapatan{Style.RESET_ALL}")
+                print("-" * 50)
+                for i, nama in enumerate(NAMA_HARI):
+                    print(f"{Fore.WHITE}{nama}\t\t{int(transaksi[i])}\t\t{liter[i]:.2f}\tRp {pendapatan[i]:.2f}{Style.RESET_ALL}")
+        except ValueError:
+            print(f"{Fore.RED}Error: Masukkan angka yang valid{Style.RESET_ALL}")
+        
+        input_kembali = input(f"\n{Fore.YELLOW}Tekan Enter untuk kembali ke menu utama...{Style.RESET_ALL}")
+        return
+    
+    def perbandingan_tahunan(self):
+        print(f"\n{Fore.CYAN}=== PERBANDINGAN TAHUN KE TAHUN ==={Style.RESET_ALL}")
+        try:
+            analitik = self.muat_analitik()
+            tahun_input = analitik and input(f"{Fore.GREEN}Masukkan tahun (YYYY) atau 'kembali' untuk ke menu utama: {Style.RESET_ALL}")
+            if tahun_input and tahun_input.lower() != 'kembali':
+                tahun = int(tahun_input)
+                if tahun > 1:
+                    sekarang, lalu, pertumbuhan = analitik.year_over_year(tahun, value='revenue')
+                    print(f"\n{Fore.WHITE}Bulan\t{tahun - 1}\t\t{tahun}\t\tPertumbuhan{Style.RESET_ALL}")
+                    print("-" * 60)
+                    for bulan in range(12):
+                        persen = '-' if math.isnan(pertumbuhan[bulan]) else f"{pertumbuhan[bulan]:+.1f}%"
+                        print(f"{Fore.WHITE}{bulan + 1}\tRp {lalu[bulan]:.0f}\tRp {sekarang[bulan]:.0f}\t{persen}{Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.RED}Error: Tahun tidak valid{Style.RESET_ALL}")
+        except ValueError:
+            print(f"{Fore.RED}Error: Masukkan angka yang valid{Style.RESET_ALL}")
+        
+        input_kembali = input(f"\n{Fore.YELLOW}Tekan Enter untuk kembali ke menu utama...{Style.RESET_ALL}")
+        return
+    
+    def perkiraan_stok(self):
+        print(f"\n{Fore.CYAN}=== PERKIRAAN STOK & RENCANA PEMESANAN BBM ==={Style.RESET_ALL}")
+        rencana = self.forecaster.plan()
+        if not rencana:
+            print(f"{Fore.RED}Error: Tidak ada produk BBM tersedia{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.WHITE}BBM\t\tStok\tLiter/hari\tHabis dalam\tPesan{Style.RESET_ALL}")
+            print("-" * 70)
+            for item in rencana:
+                habis = '-' if item['hours_to_empty'] is None else f"{item['hours_to_empty']} jam"
+                warna = Fore.RED if item['reorder_now'] else Fore.WHITE
+                print(f"{warna}{item['name']}\t\t{item['stock']}\t{item['demand_per_day']}\t\t{habis}\t\t{item['reorder_quantity']} liter{Style.RESET_ALL}")
+            print(f"\n{Fore.YELLOW}Merah: stok habis sebelum {self.forecaster.lead_time_hours} jam, segera pesan{Style.RESET_ALL}")
+        
+        input_kembali = input(f"\n{Fore.YELLOW}Tekan Enter untuk kembali ke menu utama...{Style.RESET_ALL}")
+        return
+    
+    def statistik_query(self):
+        # Menu tersembunyi: ketik 'stats' di menu utama
+        print(f"\n{Fore.CYAN}=== STATISTIK QUERY ==={Style.RESET_ALL}")
+        if self.instrumentation is None:
+            print(f"{Fore.YELLOW}Instrumentasi tidak aktif (jalankan dengan INVENTORY_PROFILE=1){Style.RESET_ALL}")
+        else:
+            print(self.instrumentation.format_report())
+            print(f"\nCache katalog: {self.db.cache_stats()}")
+        
+        input_kembali = input(f"\n{Fore.YELLOW}Tekan Enter untuk kembali ke menu utama...{Style.RESET_ALL}")
+        return
+    
     def clear_screen(self):
         os.system('cls' if os.name == 'nt' else 'clear')
         
@@ -189,7 +410,7 @@ class InventoryApp:
         while True:
             self.clear_screen()
             self.tampilkan_menu()
-            pilihan = input("Pilih menu (0-8): ")
+            pilihan = input("Pilih menu (0-13): ")
             
             if pilihan == '1':
                 self.clear_screen()
@@ -223,6 +444,29 @@ class InventoryApp:
                 self.clear_screen()
                 self.update_harga_bbm()
                 time.sleep(0.5)
+            elif pilihan == '9':
+                self.clear_screen()
+                self.laporan_tahunan()
+                time.sleep(0.5)
+            elif pilihan == '10':
+                self.clear_screen()
+                self.heatmap_penjualan()
+                time.sleep(0.5)
+            elif pilihan == '11':
+                self.clear_screen()
+                self.tren_harian()
+                time.sleep(0.5)
+            elif pilihan == '12':
+                self.clear_screen()
+                self.perbandingan_tahunan()
+                time.sleep(0.5)
+            elif pilihan == '13':
+                self.clear_screen()
+                self.perkiraan_stok()
+                time.sleep(0.5)
+            elif pilihan == 'stats':
+                self.clear_screen()
+                self.statistik_query()
             elif pilihan == '0':
                 self.clear_screen()
                 print("Terima kasih telah menggunakan aplikasi ini!")
@@ -270,10 +514,10 @@ class InventoryApp:
                 if jumlah_liter <= 0:
                     print(f"{Fore.RED}Error: Jumlah liter tidak valid{Style.RESET_ALL}")
                     return
-                total_harga = jumlah_liter * harga_per_liter
+                total_harga = sale_total(jumlah_liter, harga_per_liter)
                 print(f"\n{Fore.WHITE}Total Harga: Rp {total_harga:.2f}{Style.RESET_ALL}")
             else:
-                nominal = float(input(f"{Fore.GREEN}Masukkan nominal (Rp): {Style.RESET_ALL}"))
+                nominal = to_rupiah(input(f"{Fore.GREEN}Masukkan nominal (Rp): {Style.RESET_ALL}"))
                 if nominal <= 0:
                     print(f"{Fore.RED}Error: Nominal tidak valid{Style.RESET_ALL}")
                     return
@@ -282,12 +526,18 @@ class InventoryApp:
             
             konfirmasi = input(f"\n{Fore.YELLOW}Konfirmasi penjualan (y/n): {Style.RESET_ALL}")
             if konfirmasi.lower() == 'y':
-                if bbm[2] >= jumlah_liter:  # Cek stok
-                    total = total_harga if pilihan == '1' else nominal
-                    self.db.record_sale(bbm[0], jumlah_liter, total)
-                    print(f"{Fore.GREEN}Penjualan berhasil dicatat!{Style.RESET_ALL}")
-                else:
-                    print(f"{Fore.RED}Error: Stok BBM tidak mencukupi{Style.RESET_ALL}")
+                # Cek stok dilakukan saat dicatat, bukan dari data yang dibaca sebelum input
+                total = total_harga if pilihan == '1' else nominal
+                self.db.record_sale(bbm[0], jumlah_liter, total)
+                print(f"{Fore.GREEN}Penjualan berhasil dicatat!{Style.RESET_ALL}")
+                
+                # Peringatan dini jika stok diperkirakan habis sebelum pengiriman berikutnya
+                sisa = self.db.get_product(bbm[0])[2]
+                jam = self.forecaster.hours_to_empty(bbm[0], sisa)
+                if jam is not None and jam <= self.forecaster.lead_time_hours:
+                    print(f"{Fore.YELLOW}Peringatan: stok {bbm[1]} diperkirakan habis dalam {jam:.1f} jam{Style.RESET_ALL}")
+        except InsufficientStockError:
+            print(f"{Fore.RED}Error: Stok BBM tidak mencukupi{Style.RESET_ALL}")
         except ValueError:
             print(f"{Fore.RED}Error: Masukkan angka yang valid{Style.RESET_ALL}")
         
@@ -322,8 +572,7 @@ class InventoryApp:
                 print(f"{Fore.RED}Error: Jumlah tidak valid{Style.RESET_ALL}")
                 return
             
-            stok_baru = bbm[2] + tambahan
-            self.db.update_product(id_bbm, bbm[1], stok_baru, bbm[3])
+            self.db.restock(id_bbm, tambahan)
             print(f"{Fore.GREEN}Stok BBM berhasil ditambahkan!{Style.RESET_ALL}")
             
         except ValueError:
@@ -372,5 +621,10 @@ class InventoryApp:
         return
 
 if __name__ == '__main__':
-    app = InventoryApp()
-    app.run()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        # Mode non-interaktif: python main.py <perintah> atau --script <file>
+        from commands import main as run_commands
+        sys.exit(run_commands(sys.argv[1:]))
+    else:
+        app = InventoryApp()
+        app.run()
\ No newline at end of file